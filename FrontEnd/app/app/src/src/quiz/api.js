@@ -25,10 +25,51 @@ async function post(path, body) {
   return r.json();
 }
 
+// POST + server-sent events: calls onEvent(name, data) for each event as it arrives
+async function postStream(path, body, onEvent) {
+  const r = await fetch(`${API_BASE}${BASE_PATH}${path}`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+      ...(localStorage.getItem("token")
+        ? { Authorization: `Bearer ${localStorage.getItem("token")}` }
+        : {}),
+    },
+    credentials: "include",
+    body: JSON.stringify(body || {}),
+  });
+  if (!r.ok || !r.body) {
+    const msg = await r.text().catch(() => "");
+    throw new Error(msg || `HTTP ${r.status}`);
+  }
+  const reader = r.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buf.indexOf("\n\n")) >= 0) {
+      const block = buf.slice(0, sep);
+      buf = buf.slice(sep + 2);
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      onEvent(event, data ? JSON.parse(data) : null);
+    }
+  }
+}
+
 export const api = {
   start:        (payload) => post("/session/start",         payload),
   next:         (payload) => post("/session/next",          payload),
   hint:         (payload) => post("/session/hint",          payload),
   answer:       (payload) => post("/session/answer",        payload),
   explainBatch: (payload) => post("/session/explain_batch", payload),
+  explainStream: (payload, onEvent) => postStream("/session/explain_stream", payload, onEvent),
 };
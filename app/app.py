@@ -1,20 +1,31 @@
 import os
+import click
 from flask import Flask
 from flask_cors import CORS
 
-from config import load_settings
-from models import db, Course
+from config import engine_options, load_settings
+from sqlalchemy import text
+from models import db, Course, Tag
 from routes.auth import bp as auth_bp
 from routes.profile import bp as profile_bp
 from routes.suggest import bp as suggest_bp
 from routes.quiz_proxy import bp as quiz_proxy_bp
+from routes.admin import bp as admin_bp
+from routes.catalog import bp as catalog_bp
+from utils import bulk_import, http_cache, metrics, suggest_engine
 
-def create_app():
+def create_app(auto_migrate=None):
     cfg = load_settings()
 
     app = Flask(__name__)
     app.config["SQLALCHEMY_DATABASE_URI"] = cfg["DB_URL"]
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(cfg["DB_URL"], cfg)
+    if cfg["DB_REPLICA_URL"]:
+        # read-only paths opt in via utils.db_routing (auth lookup, /me, suggestions)
+        app.config["SQLALCHEMY_BINDS"] = {
+            "replica": {"url": cfg["DB_REPLICA_URL"], **engine_options(cfg["DB_REPLICA_URL"], cfg)},
+        }
 
     # Allow your frontend to send/receive cookies (set FRONTEND_ORIGIN in .env for prod)
     CORS(
@@ -26,11 +37,23 @@ def create_app():
         # optional: expose headers you need the browser to read
         # expose_headers=["Content-Disposition"]
     )
-    # Init DB and seed once
+    # Init DB; schema + seed run once per deploy (`flask --app app migrate && flask --app app seed`),
+    # not in every worker
     db.init_app(app)
-    with app.app_context():
-        db.create_all()
-        _seed_courses()
+    if cfg["AUTO_MIGRATE"] if auto_migrate is None else auto_migrate:
+        with app.app_context():
+            _migrate()
+            _seed_courses()
+    _register_commands(app)
+
+    # Prometheus: per-route latency/status + GET /metrics
+    metrics.init_app(app)
+
+    # ETag/304 for @cacheable views, gzip/brotli for larger JSON bodies
+    http_cache.init_app(app)
+
+    # Suggestion rules are compiled once per worker
+    suggest_engine.init_app(app)
 
     # Register routes
     # in create_app()
@@ -38,6 +61,8 @@ def create_app():
     app.register_blueprint(profile_bp, url_prefix="/api/profile")
     app.register_blueprint(suggest_bp, url_prefix="/api/suggestions")
     app.register_blueprint(quiz_proxy_bp)
+    app.register_blueprint(admin_bp,   url_prefix="/api/admin")
+    app.register_blueprint(catalog_bp, url_prefix="/api/courses")
 
     @app.get("/")
     def health():
@@ -46,6 +71,58 @@ def create_app():
     return app
 
 
+def _register_commands(app):
+    @app.cli.command("migrate")
+    def migrate():
+        """Create missing tables and indexes, backfill course tags."""
+        n = _migrate()
+        click.echo(f"schema up to date ({n} courses backfilled with tags)")
+
+    @app.cli.command("seed")
+    def seed():
+        """Insert the default course catalog (idempotent)."""
+        _seed_courses()
+        click.echo("seed done")
+
+    @app.cli.command("import-users")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="default: from the extension")
+    @click.option("--batch-size", default=1000, show_default=True)
+    @click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="hashing processes")
+    def import_users(path, fmt, batch_size, workers):
+        """Bulk-create users and profiles from a CSV/JSONL file."""
+        fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        with open(path, encoding="utf-8", newline="") as fh:
+            report = bulk_import.import_users(bulk_import.iter_rows(fh, fmt), batch_size, workers)
+        for e in report["errors"]:
+            click.echo(f"line {e['line']}: {e['email'] or '-'}: {e['error']}", err=True)
+        click.echo(f"{report['created']} created, {report['failed']} failed, {report['total']} rows")
+
+
+# Full-text search over the catalog (Postgres); must match catalog._search_filter
+COURSE_SEARCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_courses_search ON courses USING gin "
+    "(to_tsvector('english', title || ' ' || coalesce(short_description, '')))"
+)
+
+def _migrate():
+    """Idempotent schema step: tables, indexes added after the table existed, tag backfill."""
+    db.create_all()
+    for table in (Course.__table__,):
+        for idx in table.indexes:   # create_all skips indexes of tables that already exist
+            idx.create(db.engine, checkfirst=True)
+    if db.engine.dialect.name == "postgresql":
+        with db.engine.begin() as conn:
+            conn.execute(text(COURSE_SEARCH_INDEX))
+    backfilled = 0
+    for course in Course.query.filter(Course.tags.isnot(None), Course.tags != ""):
+        if not course.tag_list:
+            course.set_tags(course.tags.split(","))
+            backfilled += 1
+    db.session.commit()
+    return backfilled
+
+
 def _seed_courses():
     """Idempotent seed for the MVP OOPS course."""
     if not Course.query.filter_by(slug="oops-101").first():
@@ -58,12 +135,12 @@ def _seed_courses():
                     "with hands-on quizzes."
                 ),
                 level="Beginner",
-                tags="programming,oops,cs,foundations",
+                tag_list=Tag.resolve(["programming", "oops", "cs", "foundations"]),
             )
         )
         db.session.commit()
 
 
 if __name__ == "__main__":
-    app = create_app()
+    app = create_app(auto_migrate=True)   # local dev server: keep the zero-setup first run
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -5,6 +5,21 @@ load_dotenv()
 def _parse_origins(val: str):
     # allow comma or space separated list in .env
     return [o.strip() for o in val.replace(" ", "").split(",") if o.strip()]
+def engine_options(url: str, cfg: dict) -> dict:
+    """SQLAlchemy create_engine() options for `url` from the DB_* settings."""
+    if url.startswith("sqlite"):   # SQLite pools are per-file/thread; size options don't apply
+        return {"pool_pre_ping": cfg["DB_POOL_PRE_PING"]}
+    opts = {
+        "pool_size": cfg["DB_POOL_SIZE"],
+        "max_overflow": cfg["DB_MAX_OVERFLOW"],
+        "pool_timeout": cfg["DB_POOL_TIMEOUT"],
+        "pool_recycle": cfg["DB_POOL_RECYCLE"],
+        "pool_pre_ping": cfg["DB_POOL_PRE_PING"],
+    }
+    if url.startswith("postgresql") and cfg["DB_STATEMENT_TIMEOUT_MS"] > 0:
+        opts["connect_args"] = {"options": f"-c statement_timeout={cfg['DB_STATEMENT_TIMEOUT_MS']}"}
+    return opts
+
 def load_settings():
     return {
         "DB_URL": os.getenv(
@@ -17,5 +32,15 @@ def load_settings():
         "COOKIE_SECURE": os.getenv("COOKIE_SECURE", "false").lower() == "true",
         "COOKIE_SAMESITE": os.getenv("COOKIE_SAMESITE", "Lax"),  # Lax | None | Strict
         "COOKIE_DOMAIN": os.getenv("COOKIE_DOMAIN"),  # usually None locally
-        "CORS_ORIGINS":_parse_origins(os.getenv("CORS_ORIGINS", "http://localhost:3000"))
+        "CORS_ORIGINS":_parse_origins(os.getenv("CORS_ORIGINS", "http://localhost:3000")),
+        # Schema/seed work belongs to `flask --app app migrate` / `seed`; workers skip it unless set
+        "AUTO_MIGRATE": os.getenv("AUTO_MIGRATE", "false").lower() == "true",
+        # Connection pool (per worker process) and read replica
+        "DB_POOL_SIZE": int(os.getenv("DB_POOL_SIZE", "10")),
+        "DB_MAX_OVERFLOW": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "DB_POOL_TIMEOUT": int(os.getenv("DB_POOL_TIMEOUT", "10")),        # seconds to wait for a free connection
+        "DB_POOL_RECYCLE": int(os.getenv("DB_POOL_RECYCLE", "1800")),      # seconds; beat LB/pgbouncer idle kills
+        "DB_POOL_PRE_PING": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        "DB_STATEMENT_TIMEOUT_MS": int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000")),  # Postgres only; 0 = off
+        "DB_REPLICA_URL": os.getenv("DATABASE_REPLICA_URL"),
     }
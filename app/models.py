@@ -3,7 +3,9 @@ import enum
 import datetime as dt
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from utils.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 class UserType(enum.Enum):
     student = "student"
@@ -57,14 +59,52 @@ class ProfessionalProfile(db.Model):
     interested_profession = db.Column(db.String(200))
     user = db.relationship("User", back_populates="professional_profile")
 
+class Tag(db.Model):
+    __tablename__ = "tags"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), unique=True, nullable=False, index=True)
+
+    @staticmethod
+    def normalize(names):
+        out = []
+        for n in names:
+            n = (n or "").strip().lower()
+            if n and n not in out:
+                out.append(n)
+        return out
+
+    @classmethod
+    def resolve(cls, names):
+        """Tag rows for `names`, creating the missing ones (added to the session)."""
+        names = cls.normalize(names)
+        found = {t.name: t for t in cls.query.filter(cls.name.in_(names))} if names else {}
+        for n in names:
+            if n not in found:
+                found[n] = cls(name=n)
+                db.session.add(found[n])
+        return [found[n] for n in names]
+
+# course <-> tag; the PK serves course -> tags, the second index tag -> courses (catalog filter)
+course_tags = db.Table(
+    "course_tags",
+    db.Column("course_id", db.String(36), db.ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("tag_id", db.Integer, db.ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    db.Index("ix_course_tags_tag_id_course_id", "tag_id", "course_id"),
+)
+
 class Course(db.Model):
     __tablename__ = "courses"
     id = db.Column(db.String(36), primary_key=True, default=uuid_str)
     slug = db.Column(db.String(80), unique=True, nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     short_description = db.Column(db.String(400))
-    level = db.Column(db.String(50))           # e.g., Beginner/Intermediate
-    tags = db.Column(db.String(200))           # comma-separated for MVP
+    level = db.Column(db.String(50), index=True)   # e.g., Beginner/Intermediate
+    tags = db.Column(db.String(200))           # legacy comma-separated tags; `flask migrate` copies them into tag_list
+
+    tag_list = db.relationship("Tag", secondary=course_tags, lazy="selectin", order_by=Tag.name)
+
+    def set_tags(self, names):
+        self.tag_list = Tag.resolve(names)
 
     def to_public(self):
         return {
@@ -73,5 +113,5 @@ class Course(db.Model):
             "title": self.title,
             "short_description": self.short_description,
             "level": self.level,
-            "tags": self.tags.split(",") if self.tags else [],
+            "tags": [t.name for t in self.tag_list],
         }
\ No newline at end of file
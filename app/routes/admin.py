@@ -0,0 +1,98 @@
+# app/routes/admin.py
+import datetime as dt, hmac, io, os, shutil, tempfile, threading, uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import Blueprint, request, jsonify, current_app, url_for
+
+from utils import bulk_import
+
+# Admin endpoints are disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))   # hashing processes of the running import
+IMPORT_JOBS_KEPT = 100                                    # finished job statuses kept per worker
+
+bp = Blueprint("admin", __name__)
+
+# One import at a time per worker process: it owns IMPORT_WORKERS hashing processes while it runs
+_import_slot = threading.BoundedSemaphore(1)
+_jobs_lock = threading.Lock()
+_jobs = OrderedDict()   # job id -> status dict, oldest first
+
+def admin_required(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        supplied = request.headers.get("X-Admin-Token", "")
+        if not ADMIN_TOKEN or not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+            return jsonify({"error": "Forbidden"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+def _now():
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+def _set_job(job_id: str, **fields):
+    with _jobs_lock:
+        _jobs.setdefault(job_id, {"id": job_id}).update(fields)
+        while len(_jobs) > IMPORT_JOBS_KEPT:
+            _jobs.popitem(last=False)
+
+def _get_job(job_id: str):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+def _run_import(app, job_id: str, spool, fmt: str, batch_size: int):
+    try:
+        with app.app_context(), io.TextIOWrapper(spool, encoding="utf-8", newline="") as text:
+            _set_job(job_id, state="running", started_at=_now())
+            report = bulk_import.import_users(
+                bulk_import.iter_rows(text, fmt), batch_size, IMPORT_WORKERS,
+                progress=lambda partial: _set_job(job_id, report=partial),
+            )
+            _set_job(job_id, state="done", report=report, finished_at=_now())
+    except Exception as e:
+        app.logger.exception("User import %s failed", job_id)
+        _set_job(job_id, state="failed", error=str(e), finished_at=_now())
+    finally:
+        spool.close()
+        _import_slot.release()
+
+@bp.post("/import-users")
+@admin_required
+def import_users():
+    """Body is the raw CSV/JSONL file. It is spooled to a temp file and imported on a
+    background thread; answers 202 with the job, whose status is polled via Location."""
+    fmt = request.args.get("format") or ("jsonl" if "json" in request.mimetype else "csv")
+    if fmt not in ("csv", "jsonl"):
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+    batch_size = request.args.get("batch_size", 1000, type=int)
+    if not _import_slot.acquire(blocking=False):
+        resp = jsonify({"error": "An import is already running, please retry later"})
+        resp.headers["Retry-After"] = "30"
+        return resp, 429
+    spool = None
+    try:
+        spool = tempfile.TemporaryFile()
+        shutil.copyfileobj(request.stream, spool, 1 << 20)
+        spool.seek(0)
+        job_id = uuid.uuid4().hex
+        _set_job(job_id, state="queued", format=fmt, created_at=_now())
+        threading.Thread(target=_run_import, name=f"import-{job_id[:8]}", daemon=True,
+                         args=(current_app._get_current_object(), job_id, spool, fmt, batch_size)).start()
+    except BaseException:
+        if spool is not None:
+            spool.close()
+        _import_slot.release()
+        raise
+    resp = jsonify(_get_job(job_id))
+    resp.headers["Location"] = url_for("admin.import_status", job_id=job_id)
+    return resp, 202
+
+@bp.get("/import-users/<job_id>")
+@admin_required
+def import_status(job_id):
+    """Job status (queued | running | done | failed) with the report so far."""
+    job = _get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown import job"}), 404
+    return jsonify(job)
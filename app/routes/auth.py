@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, make_response, g
-from passlib.hash import argon2
 from models import db, User
+from utils import passwords
 from utils.auth_middleware import issue_jwt, set_session_cookie, clear_session_cookie, auth_required
+from utils.db_routing import reads_from_replica
+from utils.http_cache import cacheable
 
 bp = Blueprint("auth", __name__)
 
@@ -12,6 +14,11 @@ def require_json(*fields):
         return None, (jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400)
     return data, None
 
+def _busy():
+    resp = jsonify({"error": "Server busy, please retry"})
+    resp.headers["Retry-After"] = "1"
+    return resp, 503
+
 @bp.post("/register")
 def register():
     data, err = require_json("email", "password")
@@ -24,7 +31,11 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({"error": "Email already registered"}), 409
 
-    user = User(email=email, password_hash=argon2.hash(password), name=data.get("name"))
+    try:
+        password_hash = passwords.hash_password(password)
+    except passwords.PasswordPoolBusy:
+        return _busy()
+    user = User(email=email, password_hash=password_hash, name=data.get("name"))
     db.session.add(user)
     db.session.commit()
 
@@ -40,11 +51,19 @@ def login():
     password = data["password"]
 
     user = User.query.filter_by(email=email).first()
-    if not user or not argon2.verify(password, user.password_hash):
+    if not user:
+        return jsonify({"error": "Invalid credentials"}), 401
+    try:
+        ok, new_hash = passwords.verify_password(password, user.password_hash)
+    except passwords.PasswordPoolBusy:
+        return _busy()
+    if not ok:
         return jsonify({"error": "Invalid credentials"}), 401
 
     from datetime import datetime as dt
     user.last_login_at = dt.utcnow()
+    if new_hash:   # stored with older argon2 parameters
+        user.password_hash = new_hash
     db.session.commit()
 
     token = issue_jwt(user.id)
@@ -57,6 +76,8 @@ def logout():
     return clear_session_cookie(resp)
 
 @bp.get("/me")
+@reads_from_replica
 @auth_required
+@cacheable
 def me():
     return jsonify({"user": g.user.to_public()})
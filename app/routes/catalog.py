@@ -0,0 +1,63 @@
+import base64
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func, literal_column, or_, select
+from models import db, Course, Tag, course_tags
+from utils.db_routing import reads_from_replica
+from utils.http_cache import cacheable
+
+bp = Blueprint("catalog", __name__)
+
+MAX_LIMIT = 100
+
+def _encode_cursor(slug: str) -> str:
+    return base64.urlsafe_b64encode(slug.encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> str:
+    return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+
+def _search_filter(q: str):
+    if db.session.get_bind(mapper=Course).dialect.name == "postgresql":
+        # same expression as the ix_courses_search GIN index (app.COURSE_SEARCH_INDEX)
+        english = literal_column("'english'")
+        doc = func.to_tsvector(english, Course.title + literal_column("' '") + func.coalesce(Course.short_description, ""))
+        return doc.op("@@")(func.plainto_tsquery(english, q))
+    like = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(Course.title.ilike(like, escape="\\"), Course.short_description.ilike(like, escape="\\"))
+
+def _tag_filter(names):
+    """Courses carrying every tag in `names` (via the tag_id -> course_id index)."""
+    sub = (select(course_tags.c.course_id)
+           .join(Tag, Tag.id == course_tags.c.tag_id)
+           .where(Tag.name.in_(names))
+           .group_by(course_tags.c.course_id)
+           .having(func.count() == len(names)))
+    return Course.id.in_(sub)
+
+@bp.get("")
+@reads_from_replica
+@cacheable
+def list_courses():
+    """Keyset-paginated catalog: ?level=&tag=(repeatable)&q=&limit=&cursor=."""
+    limit = max(1, min(request.args.get("limit", 20, type=int), MAX_LIMIT))
+    stmt = select(Course).order_by(Course.slug).limit(limit + 1)
+    if request.args.get("cursor"):
+        try:
+            stmt = stmt.where(Course.slug > _decode_cursor(request.args["cursor"]))
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+    level = request.args.get("level")
+    if level:
+        stmt = stmt.where(Course.level == level)
+    tags = Tag.normalize(request.args.getlist("tag"))
+    if tags:
+        stmt = stmt.where(_tag_filter(tags))
+    q = (request.args.get("q") or "").strip()
+    if q:
+        stmt = stmt.where(_search_filter(q))
+
+    rows = db.session.scalars(stmt).all()
+    page, more = rows[:limit], len(rows) > limit
+    return jsonify({
+        "courses": [c.to_public() for c in page],
+        "next_cursor": _encode_cursor(page[-1].slug) if more else None,
+    })
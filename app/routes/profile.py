@@ -1,23 +1,43 @@
 from flask import Blueprint, request, jsonify, g
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
 from models import db, UserType, StudentProfile, ProfessionalProfile
+from utils import user_cache
 from utils.auth_middleware import auth_required
 
 bp = Blueprint("profile", __name__)
 
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def _save_profile(model, other, values: dict):
+    """Upsert the user's `model` row and drop any `other` profile, in one transaction.
+
+    Two statements, no prior SELECTs. Core statements skip the ORM events user_cache
+    listens to, so the cached user is invalidated explicitly.
+    """
+    uid = g.user.id
+    insert = _UPSERT_INSERTS.get(db.session.get_bind(mapper=model).dialect.name)
+    if insert is not None:
+        stmt = insert(model).values(user_id=uid, **values)
+        db.session.execute(stmt.on_conflict_do_update(index_elements=[model.user_id], set_=values))
+    else:
+        db.session.merge(model(user_id=uid, **values))
+    db.session.execute(delete(other).where(other.user_id == uid))
+    db.session.commit()
+    user_cache.invalidate_user(uid)
+
 @bp.post("/college-student")
 @auth_required
 def upsert_student():
     body = request.get_json(silent=True) or {}
     g.user.user_type = UserType.student
-    sp = g.user.student_profile or StudentProfile(user_id=g.user.id)
-    sp.degree = body.get("degree")
-    sp.specialization = body.get("specialization")
-    sp.college = body.get("college")
-    sp.interested_profession = body.get("interested_profession")
-    db.session.add(sp)
-    if g.user.professional_profile:
-        db.session.delete(g.user.professional_profile)
-    db.session.commit()
+    _save_profile(StudentProfile, ProfessionalProfile, {
+        "degree": body.get("degree"),
+        "specialization": body.get("specialization"),
+        "college": body.get("college"),
+        "interested_profession": body.get("interested_profession"),
+    })
     return jsonify({"ok": True})
 
 @bp.post("/working-professional")
@@ -25,12 +45,9 @@ def upsert_student():
 def upsert_professional():
     body = request.get_json(silent=True) or {}
     g.user.user_type = UserType.professional
-    pp = g.user.professional_profile or ProfessionalProfile(user_id=g.user.id)
-    pp.current_role = body.get("current_role")
-    pp.organization = body.get("organization")
-    pp.interested_profession = body.get("interested_profession")
-    db.session.add(pp)
-    if g.user.student_profile:
-        db.session.delete(g.user.student_profile)
-    db.session.commit()
+    _save_profile(ProfessionalProfile, StudentProfile, {
+        "current_role": body.get("current_role"),
+        "organization": body.get("organization"),
+        "interested_profession": body.get("interested_profession"),
+    })
     return jsonify({"ok": True})
@@ -1,38 +1,82 @@
 # app/routes/quiz_proxy.py
-import os
+import os, time
+from http.cookiejar import DefaultCookiePolicy
 import requests
+from requests.adapters import HTTPAdapter
 from flask import Blueprint, request, Response, current_app
 
+from utils import metrics
+
 # FastAPI quiz engine base URL
 QUIZ_BASE = os.getenv("QUIZ_BASE", "http://localhost:8001")
+# Keep-alive pool towards the quiz engine (max idle+active connections per worker)
+QUIZ_POOL_SIZE = int(os.getenv("QUIZ_POOL_SIZE", "32"))
+QUIZ_CONNECT_TIMEOUT = float(os.getenv("QUIZ_CONNECT_TIMEOUT", "3"))
+QUIZ_READ_TIMEOUT = float(os.getenv("QUIZ_READ_TIMEOUT", "15"))   # max gap between upstream bytes
+STREAM_CHUNK = 16 * 1024
 
 bp = Blueprint("quiz_proxy", __name__, url_prefix="/api/quiz")
 
 # Headers to forward
 FORWARD_HEADERS = {"authorization", "content-type", "cookie"}
 
+def _make_session() -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=QUIZ_POOL_SIZE, max_retries=0)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    # The session is shared by all users: never let upstream cookies stick to it
+    s.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return s
+
+_session = _make_session()
+
+def _stream_body(r: requests.Response, path: str, logger):
+    # Runs after the view returned: no app context here, so the logger is passed in
+    try:
+        for chunk in r.iter_content(chunk_size=STREAM_CHUNK):
+            if chunk:
+                yield chunk
+    except requests.RequestException:
+        metrics.PROXY_UPSTREAM_ERRORS.labels(path, "stream").inc()
+        logger.exception("Quiz proxy stream aborted")
+    finally:
+        r.close()
+
 def _forward(path: str):
     url = f"{QUIZ_BASE}{path}"
     headers = {k: v for k, v in request.headers if k.lower() in FORWARD_HEADERS}
 
+    t0 = time.perf_counter()
     try:
-        r = requests.request(
+        r = _session.request(
             method=request.method,
             url=url,
             headers=headers,
             params=request.args,
             data=request.get_data(),
-            timeout=15,
+            timeout=(QUIZ_CONNECT_TIMEOUT, QUIZ_READ_TIMEOUT),
+            stream=True,
         )
     except requests.RequestException as e:
+        kind = "timeout" if isinstance(e, requests.Timeout) else "connect"
+        metrics.PROXY_UPSTREAM_ERRORS.labels(path, kind).inc()
         current_app.logger.exception("Quiz proxy error")
         return Response(f"Upstream error: {e}", status=502)
+    metrics.PROXY_UPSTREAM_LATENCY.labels(path).observe(time.perf_counter() - t0)
+    if r.status_code >= 500:
+        metrics.PROXY_UPSTREAM_ERRORS.labels(path, "http_5xx").inc()
 
-    resp = Response(r.content, status=r.status_code)
+    resp = Response(_stream_body(r, path, current_app.logger), status=r.status_code)
+    resp.call_on_close(r.close)
     if "content-type" in r.headers:
         resp.headers["Content-Type"] = r.headers["content-type"]
     if "set-cookie" in r.headers:
         resp.headers["Set-Cookie"] = r.headers["set-cookie"]
+    if r.headers.get("content-type", "").startswith("text/event-stream"):
+        # Keep intermediaries (nginx etc.) from buffering server-sent events
+        resp.headers["Cache-Control"] = "no-cache"
+        resp.headers["X-Accel-Buffering"] = "no"
     return resp
 
 # --- Map the quiz endpoints ---
@@ -50,3 +94,6 @@ def qp_answer(): return _forward("/session/answer")
 
 @bp.route("/session/explain_batch", methods=["POST", "OPTIONS"])
 def qp_explain_batch(): return _forward("/session/explain_batch")
+
+@bp.route("/session/explain_stream", methods=["POST", "OPTIONS"])
+def qp_explain_stream(): return _forward("/session/explain_stream")
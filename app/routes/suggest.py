@@ -1,26 +1,19 @@
-from flask import Blueprint, jsonify, g
+from flask import Blueprint, g, current_app
 from utils.auth_middleware import auth_required
-from models import db, UserType, Course
+from utils.db_routing import reads_from_replica
+from utils.http_cache import cacheable
 
 bp = Blueprint("suggest", __name__, url_prefix="/suggestions")
 
 @bp.get("")
+@reads_from_replica
 @auth_required
+@cacheable
 def get_suggestions():
-    u = g.user
-
-    # Default: nothing to suggest yet
-    suggestions = []
-
-    # --- MVP rule: Student + BE + Computer Science => OOPS course
-    if u.user_type == UserType.student and u.student_profile:
-        deg = (u.student_profile.degree or "").lower()
-        spec = (u.student_profile.specialization or "").lower()
-        if ("b.e" in deg or "be" in deg or "bachelor" in deg) and any(
-            key in spec for key in ["computer science", "cs", "cse", "cs-and"]
-        ):
-            oops = Course.query.filter_by(slug="oops-101").first()
-            if oops:
-                suggestions.append(oops.to_public())
-
-    return jsonify({"suggestions": suggestions})
+    # Rules live in data/suggestion_rules.json; courses come from the in-memory index.
+    # The serialized payload is cached per user and course-content/profile version, which is also
+    # the ETag. No Last-Modified: the build time is per worker and says nothing about the content.
+    etag, body = current_app.extensions["suggestions"].payload(g.user)
+    resp = current_app.response_class(body, mimetype="application/json")
+    resp.set_etag(etag, weak=True)
+    return resp
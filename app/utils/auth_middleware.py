@@ -1,11 +1,10 @@
 # utils/auth_middleware.py
-import os, time, jwt
+import os, time, jwt, hashlib, threading
+from collections import OrderedDict
 from functools import wraps
-from datetime import datetime, timezone
 from flask import request, jsonify, g
-from sqlalchemy import or_
 
-from models import User
+from utils import user_cache
 
 # ---- Config (env-overridable) ----
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-super-secret-change-me")
@@ -18,6 +17,9 @@ COOKIE_NAME = os.getenv("COOKIE_NAME", "session")
 COOKIE_SAMESITE = os.getenv("COOKIE_SAMESITE", "Lax")  # "Lax" | "None" | "Strict"
 COOKIE_SECURE = os.getenv("COOKIE_SECURE", "false").lower() == "true"
 
+# Verified tokens kept per process (until their exp) to skip repeat signature checks
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+
 # ---- Token issue/verify helpers ----
 def issue_jwt(user_id: str) -> str:
     now = int(time.time())
@@ -28,14 +30,33 @@ def issue_jwt(user_id: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
 
+_token_lock = threading.Lock()
+_token_cache = OrderedDict()   # sha256(token) -> (exp, claims)
+
 def _decode_jwt(token: str) -> dict:
-    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    with _token_lock:
+        hit = _token_cache.get(key)
+        if hit is not None:
+            if hit[0] > time.time():
+                _token_cache.move_to_end(key)
+                return hit[1]
+            del _token_cache[key]
+    # Expired/invalid tokens raise here, exactly as without the cache
+    claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):   # never cache tokens that don't expire
+        with _token_lock:
+            _token_cache[key] = (float(exp), claims)
+            while len(_token_cache) > TOKEN_CACHE_MAX:
+                _token_cache.popitem(last=False)
+    return claims
 
 def _load_user_from_claims(claims):
     sub = claims.get("sub") or claims.get("user_id") or claims.get("uid") or claims.get("email")
     if not sub:
         return None, "no subject (sub/user_id/email) in token"
-    user = User.query.filter(or_(User.id == sub, User.email == sub)).first()
+    user = user_cache.get_user(str(sub))
     if not user:
         return None, f"user not found for subject '{sub}'"
     return user, None
@@ -71,10 +92,7 @@ def auth_required(f):
             try:
                 scheme, tok = auth.split(" ", 1)
                 if scheme.lower() in ("bearer", "jwt"):
-                    claims = _decode_jwt(tok.strip())
-                    exp = claims.get("exp")
-                    if exp and datetime.fromtimestamp(exp, tz=timezone.utc) < datetime.now(timezone.utc):
-                        return jsonify({"error": "token expired"}), 401
+                    claims = _decode_jwt(tok.strip())   # PyJWT already enforces exp
                     user, uerr = _load_user_from_claims(claims)
                     if uerr:
                         return jsonify({"error": uerr}), 401
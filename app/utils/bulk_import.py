@@ -0,0 +1,160 @@
+# utils/bulk_import.py
+# Streaming bulk import of users with their profile (CSV with a header row, or JSONL).
+# - rows are read lazily and handled in batches; memory stays flat for any file size
+# - per batch: validate, drop emails already registered (one IN query), hash passwords on
+#   a dedicated process pool, then one executemany INSERT per table and one commit
+# - a batch that still hits a constraint (e.g. someone registered meanwhile) is redone row
+#   by row, so a bad row never aborts its neighbours; every rejected row is reported
+#
+# Columns: email, password, name, type (student | professional, empty = no profile) and the
+# profile fields of that type (degree, specialization, college, current_role, organization,
+# interested_profession).
+import csv, json, datetime as dt
+from itertools import islice
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User, StudentProfile, ProfessionalProfile, uuid_str
+from utils import passwords
+
+PROFILE_FIELDS = {
+    "student": (StudentProfile, ("degree", "specialization", "college", "interested_profession")),
+    "professional": (ProfessionalProfile, ("current_role", "organization", "interested_profession")),
+}
+TYPE_ALIASES = {"student": "student", "college-student": "student",
+                "professional": "professional", "working-professional": "professional"}
+MAX_REPORTED_ERRORS = 1000   # the counts stay exact past this
+
+
+def iter_rows(fh, fmt: str):
+    """Yields (line_no, row dict) from an open text file; unparsable lines carry "_error"."""
+    if fmt == "csv":
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for n, line in enumerate(fh, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {"_error": f"invalid JSON: {e}"}
+        yield n, row if isinstance(row, dict) else {"_error": "not a JSON object"}
+
+
+class _Report:
+    def __init__(self):
+        self.total = self.created = self.failed = 0
+        self.errors = []
+
+    def error(self, line, email, msg):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "email": email or None, "error": msg})
+
+    def to_dict(self):
+        return {"total": self.total, "created": self.created, "failed": self.failed,
+                "errors": self.errors, "errors_truncated": self.failed > len(self.errors)}
+
+
+def _clean(row: dict):
+    """(record, None) or (None, error message)."""
+    if "_error" in row:
+        return None, row["_error"]
+    get = lambda k: (str(row.get(k) or "")).strip()
+    email = get("email").lower()
+    if "@" not in email:
+        return None, "invalid email"
+    password = str(row.get("password") or "")
+    if len(password) < 8:
+        return None, "Password must be at least 8 characters"
+    kind = get("type") or get("user_type")
+    if kind and kind.lower() not in TYPE_ALIASES:
+        return None, f"unknown type {kind!r}"
+    kind = TYPE_ALIASES.get(kind.lower()) if kind else None
+    profile = {f: get(f) or None for f in PROFILE_FIELDS[kind][1]} if kind else None
+    return {"email": email, "password": password, "name": get("name") or None,
+            "kind": kind, "profile": profile}, None
+
+
+def _rows_for(users):
+    """(user rows, {model: profile rows}) for [(line, record, uid, hash)]."""
+    now = dt.datetime.utcnow()
+    user_rows, profile_rows = [], {}
+    for _, rec, uid, pw_hash in users:
+        user_rows.append({"id": uid, "email": rec["email"], "password_hash": pw_hash,
+                          "name": rec["name"], "created_at": now})
+        if rec["kind"]:
+            model = PROFILE_FIELDS[rec["kind"]][0]
+            profile_rows.setdefault(model, []).append({"user_id": uid, **rec["profile"]})
+    return user_rows, profile_rows
+
+def _insert(users):
+    user_rows, profile_rows = _rows_for(users)
+    db.session.execute(insert(User), user_rows)            # executemany (batched multi-row VALUES)
+    for model, rows in profile_rows.items():
+        db.session.execute(insert(model), rows)
+
+
+def _import_batch(chunk, seen: set, hash_batch, report: _Report):
+    valid = []
+    for line, row in chunk:
+        report.total += 1
+        rec, err = _clean(row)
+        if err:
+            report.error(line, str(row.get("email") or "").strip().lower(), err)
+        elif rec["email"] in seen:
+            report.error(line, rec["email"], "duplicate email in file")
+        else:
+            seen.add(rec["email"])
+            valid.append((line, rec))
+    if not valid:
+        return
+
+    taken = set(db.session.scalars(select(User.email).where(User.email.in_([r["email"] for _, r in valid]))))
+    fresh = []
+    for line, rec in valid:
+        if rec["email"] in taken:
+            report.error(line, rec["email"], "Email already registered")
+        else:
+            fresh.append((line, rec))
+    if not fresh:
+        return
+
+    hashes = hash_batch([rec["password"] for _, rec in fresh])
+    users = [(line, rec, uuid_str(), h) for (line, rec), h in zip(fresh, hashes)]
+    try:
+        _insert(users)
+        db.session.commit()
+        report.created += len(users)
+        return
+    except IntegrityError:
+        db.session.rollback()
+    for u in users:   # rare: isolate the conflicting rows
+        try:
+            _insert([u])
+            db.session.commit()
+            report.created += 1
+        except IntegrityError:
+            db.session.rollback()
+            report.error(u[0], u[1]["email"], "Email already registered")
+
+
+def import_users(rows, batch_size: int = 1000, workers: int = 2, progress=None) -> dict:
+    """Create users/profiles from (line, row) pairs (see iter_rows); returns the report dict.
+
+    `progress`, if given, is called with the report so far after every batch.
+    """
+    report, seen = _Report(), set()
+    rows = iter(rows)
+    with passwords.bulk_hasher(workers) as hash_batch:
+        while True:
+            chunk = list(islice(rows, max(1, batch_size)))
+            if not chunk:
+                break
+            _import_batch(chunk, seen, hash_batch, report)
+            if progress is not None:
+                progress(report.to_dict())
+    return report.to_dict()
@@ -0,0 +1,53 @@
+# utils/db_routing.py
+# Read-replica routing for db.session.
+# - REPLICA_URL becomes the "replica" bind (see config.load_settings / create_app)
+# - inside replica_reads() (or a @reads_from_replica view) queries go to the replica;
+#   flushes and everything else stay on the primary; primary_reads() opts back out
+# - without a replica configured, both are no-ops
+from contextlib import contextmanager
+from functools import wraps
+
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = "replica"
+_FLAG = "use_replica"
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(_FLAG) and not self._flushing:
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def has_replica() -> bool:
+    from models import db
+    return REPLICA_BIND in db.engines
+
+@contextmanager
+def _route(use_replica: bool):
+    from models import db
+    info = db.session.info
+    prev = info.get(_FLAG, False)
+    info[_FLAG] = use_replica
+    try:
+        yield
+    finally:
+        info[_FLAG] = prev
+
+def replica_reads():
+    return _route(True)
+
+def primary_reads():
+    """Force the primary, e.g. to read back a write the replica may not have yet."""
+    return _route(False)
+
+def reads_from_replica(fn):
+    """Route every query of a read-only view (auth lookup included) to the replica."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,70 @@
+# utils/http_cache.py
+# Conditional GETs and compression for JSON responses.
+# - @cacheable views get a weak ETag (hash of the body unless the view set one) and
+#   Cache-Control: private, no-cache; If-None-Match hits answer 304
+# - JSON bodies of at least COMPRESS_MIN_BYTES are brotli- (when installed) or gzip-encoded;
+#   ETags are weak, so the identity and compressed variants validate against each other
+import gzip, hashlib, os
+from functools import wraps
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:   # optional: gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))   # 0 disables compression
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5   # fast enough per request, close to gzip -9 in size
+
+
+def cacheable(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g._http_cacheable = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+def etag_for(*parts) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def _conditional(resp):
+    if not resp.get_etag()[0]:
+        resp.set_etag(etag_for(resp.get_data()), weak=True)
+    resp.headers.setdefault("Cache-Control", "private, no-cache")
+    resp.vary.add("Cookie")
+    resp.vary.add("Authorization")
+    return resp.make_conditional(request)   # 304 (body dropped on send) when the client is current
+
+def _compress(resp):
+    if (COMPRESS_MIN_BYTES <= 0 or resp.direct_passthrough or resp.is_streamed
+            or resp.status_code != 200 or resp.mimetype != "application/json"
+            or "Content-Encoding" in resp.headers):
+        return resp
+    body = resp.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return resp
+    resp.vary.add("Accept-Encoding")
+    accept = request.accept_encodings
+    if brotli is not None and accept["br"]:
+        data, encoding = brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    elif accept["gzip"]:
+        data, encoding = gzip.compress(body, GZIP_LEVEL), "gzip"
+    else:
+        return resp
+    resp.set_data(data)
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
+def init_app(app):
+    @app.after_request
+    def _http_cache(resp):
+        if g.get("_http_cacheable") and request.method in ("GET", "HEAD") and resp.status_code == 200:
+            resp = _conditional(resp)
+        return _compress(resp)
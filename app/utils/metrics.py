@@ -0,0 +1,49 @@
+# utils/metrics.py
+# Prometheus metrics for the Flask API: per-route latency/status and the quiz proxy hop.
+# With several workers, set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates all of them.
+import os, time
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram,
+                               REGISTRY, generate_latest, multiprocess)
+
+HTTP_LATENCY = Histogram(
+    "api_http_request_seconds", "Flask API request latency (to response headers)", ["route", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20),
+)
+HTTP_REQUESTS = Counter("api_http_requests_total", "Flask API requests", ["route", "method", "status"])
+
+PROXY_UPSTREAM_LATENCY = Histogram(
+    "quiz_proxy_upstream_seconds", "Quiz engine response time seen by the proxy (to headers)", ["path"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20),
+)
+PROXY_UPSTREAM_ERRORS = Counter(
+    "quiz_proxy_upstream_errors_total", "Quiz proxy upstream failures", ["path", "kind"],  # connect|timeout|http_5xx|stream
+)
+
+PASSWORD_REJECTED = Counter(
+    "api_password_pool_rejected_total", "Hash/verify calls refused (503) because the password pool queue was full",
+)
+
+
+def init_app(app):
+    @app.before_request
+    def _start_timer():
+        g._metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _observe(resp):
+        t0 = g.pop("_metrics_t0", None)
+        if t0 is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_LATENCY.labels(route, request.method).observe(time.perf_counter() - t0)
+            HTTP_REQUESTS.labels(route, request.method, str(resp.status_code)).inc()
+        return resp
+
+    @app.get("/metrics")
+    def metrics():
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
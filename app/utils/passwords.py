@@ -0,0 +1,111 @@
+# utils/passwords.py
+# Argon2 hashing off the request threads.
+# - hash/verify run in a small process pool, so a login spike burns those processes' CPU,
+#   not the threads serving every other endpoint of this worker
+# - at most PASSWORD_WORKERS + PASSWORD_MAX_QUEUE calls in flight per worker; past that
+#   PasswordPoolBusy is raised and routes answer 503 instead of piling up
+# - cost parameters come from env; verify() also returns a fresh hash when the stored one
+#   was made with other parameters, so logins migrate users transparently
+import os, threading, multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from passlib.hash import argon2
+
+# Defaults are passlib's own, so existing hashes stay current
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))   # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))       # 0 -> hash inline (tests, scripts)
+PASSWORD_MAX_QUEUE = int(os.getenv("PASSWORD_MAX_QUEUE", "32"))  # waiting calls beyond the busy workers
+PASSWORD_TIMEOUT = float(os.getenv("PASSWORD_TIMEOUT", "10"))    # seconds a request waits for its result
+
+_hasher = argon2.using(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST,
+                       parallelism=ARGON2_PARALLELISM)
+
+
+class PasswordPoolBusy(Exception):
+    """Too many hash/verify calls queued in this worker; retry later."""
+
+
+# ---- run in the pool processes (module-level so they pickle)
+def _hash(password: str) -> str:
+    return _hasher.hash(password)
+
+def _verify(password: str, stored: str):
+    """(ok, new_hash): new_hash is set when ok and `stored` uses outdated parameters."""
+    try:
+        ok = _hasher.verify(password, stored)
+    except (ValueError, TypeError):   # malformed/foreign hash
+        return False, None
+    if ok and _hasher.needs_update(stored):
+        return True, _hasher.hash(password)
+    return ok, None
+
+
+# ---- request side
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, PASSWORD_WORKERS + PASSWORD_MAX_QUEUE))
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:   # created on first use, not at import (keeps worker startup fast)
+                # spawn: forking a threaded web worker can copy held locks into the child
+                _pool = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _busy():
+    from utils import metrics   # not at import: the pool processes import this module too
+    metrics.PASSWORD_REJECTED.inc()
+    return PasswordPoolBusy()
+
+def _run(fn, *args):
+    if PASSWORD_WORKERS <= 0:
+        return fn(*args)
+    if not _slots.acquire(blocking=False):
+        raise _busy()
+    try:
+        fut = _get_pool().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    fut.add_done_callback(lambda _: _slots.release())   # the slot is held until the work is really done
+    try:
+        return fut.result(timeout=PASSWORD_TIMEOUT)
+    except FutureTimeout:
+        raise _busy()
+    except BrokenProcessPool:
+        _reset_pool()   # a child died (e.g. OOM); the next call starts a fresh pool
+        raise
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password)
+
+def verify_password(password: str, stored: str):
+    """Returns (ok, new_hash); store new_hash when it is not None."""
+    return _run(_verify, password, stored)
+
+@contextmanager
+def bulk_hasher(workers: int):
+    """Yields hash_batch(list_of_passwords) -> list_of_hashes on a pool of its own.
+
+    Imports use this instead of the request pool, so a 50k-row import neither takes the
+    login/register slots nor gets 503s from them.
+    """
+    if workers <= 0:
+        yield lambda pws: [_hash(p) for p in pws]
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        yield lambda pws: list(pool.map(_hash, pws, chunksize=max(1, len(pws) // (workers * 4))))
@@ -0,0 +1,161 @@
+# utils/suggest_engine.py
+# Data-driven course suggestions:
+# - rules (data/suggestion_rules.json) are compiled once into regex matchers over profile fields
+# - courses live in an in-memory index (slug -> public dict, tag -> slugs) rebuilt after Course writes
+# - serialized payloads are cached per user, keyed by index version + profile contents; the
+#   version is a hash of the indexed courses, so it (and the ETag) agrees across workers and restarts
+import json, os, re, threading, time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from models import Course
+from utils.http_cache import etag_for
+
+RULES_PATH = os.getenv(
+    "SUGGESTION_RULES",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "suggestion_rules.json"),
+)
+# Course writes from other processes are picked up after this many seconds
+COURSE_INDEX_TTL = float(os.getenv("COURSE_INDEX_TTL", "300"))
+SUGGESTION_CACHE_MAX = int(os.getenv("SUGGESTION_CACHE_MAX", "10000"))   # users per process
+
+PROFILE_ATTR = {"student": "student_profile", "professional": "professional_profile"}
+
+
+class Rule:
+    def __init__(self, spec: dict):
+        self.name = spec.get("name", "")
+        self.profile_attr = PROFILE_ATTR[spec["user_type"]]
+        # field -> one compiled alternation of its (lower-cased) substrings
+        self.matchers = [
+            (field, re.compile("|".join(re.escape(k.lower()) for k in keys)))
+            for field, keys in spec.get("match", {}).items()
+        ]
+        self.slugs = list(spec.get("slugs", []))
+        self.tags = list(spec.get("tags", []))
+
+    def matches(self, user) -> bool:
+        profile = getattr(user, self.profile_attr, None)
+        if profile is None:
+            return False
+        return all(rx.search((getattr(profile, field, None) or "").lower()) for field, rx in self.matchers)
+
+
+class CourseIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._built_at = 0.0
+        self.version = ""   # content hash of by_slug
+        self.by_slug = {}   # slug -> public dict
+        self.by_tag = {}    # tag -> [slug, ...]
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def _rebuild(self):
+        by_slug, by_tag = {}, {}
+        for c in Course.query.order_by(Course.slug).all():
+            pub = c.to_public()
+            by_slug[c.slug] = pub
+            for tag in pub["tags"]:
+                by_tag.setdefault(tag, []).append(c.slug)
+        self.by_slug, self.by_tag = by_slug, by_tag
+        self.version = etag_for(json.dumps(by_slug, sort_keys=True, separators=(",", ":")))
+        self._built_at = time.time()
+
+    def ensure_fresh(self):
+        if self._dirty or time.time() - self._built_at > COURSE_INDEX_TTL:
+            with self._lock:
+                if self._dirty or time.time() - self._built_at > COURSE_INDEX_TTL:
+                    self._dirty = False
+                    self._rebuild()
+
+
+def _profile_fingerprint(user) -> tuple:
+    """Everything rules can match on; equal fingerprints give equal suggestions."""
+    out = []
+    for attr in PROFILE_ATTR.values():
+        prof = getattr(user, attr, None)
+        out.append(None if prof is None else
+                   tuple((a.key, getattr(prof, a.key)) for a in inspect(type(prof)).column_attrs))
+    return tuple(out)
+
+
+class SuggestionEngine:
+    def __init__(self, rules):
+        self.rules = [Rule(r) for r in rules]
+        self.index = CourseIndex()
+        self._payload_lock = threading.Lock()
+        self._payloads = OrderedDict()   # user id -> (key, etag, json bytes)
+
+    @classmethod
+    def from_file(cls, path: str = RULES_PATH):
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def suggest(self, user) -> list:
+        self.index.ensure_fresh()
+        slugs = []
+        for rule in self.rules:
+            if not rule.matches(user):
+                continue
+            slugs.extend(rule.slugs)
+            for tag in rule.tags:
+                slugs.extend(self.index.by_tag.get(tag, ()))
+        seen, out = set(), []
+        for slug in slugs:
+            pub = self.index.by_slug.get(slug)
+            if pub is not None and slug not in seen:
+                seen.add(slug)
+                out.append(pub)
+        return out
+
+    def payload(self, user):
+        """(etag, JSON bytes of {"suggestions": [...]}) for `user`, cached per version."""
+        self.index.ensure_fresh()
+        key = (self.index.version, _profile_fingerprint(user))
+        with self._payload_lock:
+            hit = self._payloads.get(user.id)
+            if hit is not None and hit[0] == key:
+                self._payloads.move_to_end(user.id)
+                return hit[1:]
+        body = json.dumps({"suggestions": self.suggest(user)}, separators=(",", ":")).encode("utf-8")
+        entry = (key, etag_for(user.id, key[0], repr(key[1])), body)
+        with self._payload_lock:
+            self._payloads[user.id] = entry
+            self._payloads.move_to_end(user.id)
+            while len(self._payloads) > SUGGESTION_CACHE_MAX:
+                self._payloads.popitem(last=False)
+        return entry[1:]
+
+
+# ---- rebuild after committed Course writes (registered once; the engine is the current app's)
+def _course_written(mapper, connection, target):
+    sess = object_session(target)
+    if sess is not None:
+        sess.info["courses_changed"] = True
+
+for _evt in ("after_insert", "after_update", "after_delete"):
+    event.listen(Course, _evt, _course_written)
+
+@event.listens_for(Session, "after_commit")
+def _courses_committed(session):
+    # Rebuild only once the Course write is committed, so the new index can see it
+    if session.info.pop("courses_changed", False) and has_app_context():
+        engine = current_app.extensions.get("suggestions")
+        if engine is not None:
+            engine.index.mark_dirty()
+
+@event.listens_for(Session, "after_rollback")
+def _courses_rolled_back(session):
+    session.info.pop("courses_changed", None)
+
+
+def init_app(app):
+    engine = SuggestionEngine.from_file()
+    app.extensions["suggestions"] = engine
+    return engine
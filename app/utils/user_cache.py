@@ -0,0 +1,153 @@
+# utils/user_cache.py
+# Per-process TTL cache of authenticated users (with their profiles), keyed by
+# token subject. Entries are plain column snapshots, re-attached to the
+# request's session without a query; any committed write to a user or profile
+# drops that user's entries. For USER_CACHE_REPLICA_GRACE seconds after such a
+# write the user is read from the primary, so a lagging replica cannot serve or
+# re-cache the old row.
+import os, threading, time, uuid
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached, object_session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import db, User, StudentProfile, ProfessionalProfile
+from utils.db_routing import has_replica, primary_reads, replica_reads
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))      # seconds
+USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX", "10000"))     # entries per process
+USER_CACHE_REPLICA_GRACE = float(os.getenv("USER_CACHE_REPLICA_GRACE", "5"))   # seconds of expected replica lag
+
+_PROFILES = (("student_profile", StudentProfile), ("professional_profile", ProfessionalProfile))
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # subject -> (expires_at, snapshot)
+_subjects = {}             # user id -> {subjects cached for that user}
+_written = OrderedDict()   # user id / subject -> primary-only until (oldest first)
+
+
+def _columns(obj) -> dict:
+    return {a.key: getattr(obj, a.key) for a in inspect(type(obj)).column_attrs}
+
+def _snapshot(user: User) -> dict:
+    snap = {"user": _columns(user)}
+    for rel, _ in _PROFILES:
+        prof = getattr(user, rel)
+        snap[rel] = _columns(prof) if prof is not None else None
+    return snap
+
+def _detached(model, cols: dict):
+    obj = model(**cols)
+    make_transient_to_detached(obj)   # looks freshly loaded: no pending changes
+    return obj
+
+def _attach(snap: dict) -> User:
+    user = _detached(User, snap["user"])
+    for rel, model in _PROFILES:
+        cols = snap[rel]
+        set_committed_value(user, rel, _detached(model, cols) if cols is not None else None)
+    return db.session.merge(user, load=False)
+
+def _is_uuid(val: str) -> bool:
+    try:
+        uuid.UUID(val)
+        return True
+    except ValueError:
+        return False
+
+# Both profiles come back in the same query as the user (the snapshot needs them)
+_EAGER = (joinedload(User.student_profile), joinedload(User.professional_profile))
+
+def _query_user(sub: str):
+    # populate_existing: a row the replica put in the identity map is overwritten on re-read
+    if _is_uuid(sub):
+        return db.session.get(User, sub, options=_EAGER, populate_existing=True)
+    return User.query.options(*_EAGER).populate_existing().filter_by(email=sub).first()
+
+def _recently_written(*keys) -> bool:
+    now = time.time()
+    with _lock:
+        return any(_written.get(k, 0) > now for k in keys)
+
+def _load_user(sub: str):
+    """(user, snapshot) read from the replica when it can be trusted, else from the primary."""
+    if has_replica() and not _recently_written(sub):
+        with replica_reads():
+            user = _query_user(sub)
+            if user is not None and not _recently_written(user.id):
+                return user, _snapshot(user)   # profiles load on the replica too
+    # no replica, a fresh write, or a user registered a moment ago that has not replicated yet
+    with primary_reads():
+        user = _query_user(sub)
+        return (user, _snapshot(user)) if user is not None else (None, None)
+
+
+def get_user(sub: str):
+    """Return the User for a token subject (id or email), or None."""
+    now = time.time()
+    with _lock:
+        hit = _entries.get(sub)
+        if hit is not None and hit[0] > now:
+            _entries.move_to_end(sub)
+            snap = hit[1]
+        else:
+            snap = None
+    if snap is not None:
+        return _attach(snap)
+
+    user, snap = _load_user(sub)
+    if user is None:
+        return None
+    with _lock:
+        _entries[sub] = (now + USER_CACHE_TTL, snap)
+        _entries.move_to_end(sub)
+        _subjects.setdefault(user.id, set()).add(sub)
+        while len(_entries) > USER_CACHE_MAX:
+            old_sub, (_, old) = _entries.popitem(last=False)
+            subs = _subjects.get(old["user"]["id"])
+            if subs:
+                subs.discard(old_sub)
+                if not subs:
+                    del _subjects[old["user"]["id"]]
+    return user
+
+def invalidate_user(user_id: str):
+    now = time.time()
+    with _lock:
+        subs = _subjects.pop(user_id, ())
+        for sub in subs:
+            _entries.pop(sub, None)
+        if USER_CACHE_REPLICA_GRACE > 0:
+            for key in (user_id, *subs):
+                _written.pop(key, None)
+                _written[key] = now + USER_CACHE_REPLICA_GRACE
+            while _written and next(iter(_written.values())) <= now:
+                _written.popitem(last=False)
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _subjects.clear()
+        _written.clear()
+
+
+# ---- invalidation on committed ORM writes ----
+def _mark_dirty(mapper, connection, target):
+    sess = object_session(target)
+    if sess is not None:
+        uid = target.id if isinstance(target, User) else target.user_id
+        sess.info.setdefault("dirty_user_ids", set()).add(uid)
+
+for _model in (User, StudentProfile, ProfessionalProfile):
+    for _evt in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _evt, _mark_dirty)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for uid in session.info.pop("dirty_user_ids", ()):
+        invalidate_user(uid)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("dirty_user_ids", None)
@@ -0,0 +1,66 @@
+# bench/auth_bench.py
+# Micro-benchmark of the Flask auth path (JWT verification + user load).
+#
+#   python bench/auth_bench.py [-n 5000]
+#
+# Runs against an in-memory SQLite database; no Postgres needed.
+
+import argparse
+import os
+
+from common import timeit, use_repo_paths
+
+use_repo_paths()
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Auth path micro-benchmark")
+    ap.add_argument("-n", type=int, default=5000, help="iterations per case")
+    args = ap.parse_args(argv)
+
+    from app import create_app
+    from models import db, User
+    from utils import auth_middleware as am, user_cache
+
+    app = create_app(auto_migrate=True)
+    with app.app_context():
+        user = User(email="bench@example.com", password_hash="x", name="Bench")
+        db.session.add(user)
+        db.session.commit()
+        token = am.issue_jwt(user.id)
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def decode_cold():
+        am._token_cache.clear()
+        am._decode_jwt(token)
+
+    def decode_warm():
+        am._decode_jwt(token)
+
+    protected = am.auth_required(lambda: "ok")
+
+    def decorator_warm():
+        with app.test_request_context("/api/auth/me", headers=headers):
+            assert protected() == "ok"
+
+    def me_cold():
+        am._token_cache.clear()
+        user_cache.clear()
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    def me_warm():
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    print(f"auth path, n={args.n}")
+    timeit("jwt decode (no cache)", decode_cold, args.n)
+    timeit("jwt decode (token cache hit)", decode_warm, args.n)
+    timeit("auth_required only (warm caches)", decorator_warm, args.n)
+    timeit("GET /api/auth/me (cold caches)", me_cold, max(1, args.n // 5))
+    timeit("GET /api/auth/me (warm caches)", me_warm, max(1, args.n // 5))
+
+
+if __name__ == "__main__":
+    main()
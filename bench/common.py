@@ -0,0 +1,44 @@
+# bench/common.py
+# Shared helpers for the scripts in bench/.
+
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+APP_DIR = os.path.join(ROOT, "app")
+
+
+def use_repo_paths():
+    """Make `quiz.*` (repo root) and the Flask app's flat modules (app/) importable."""
+    for p in (ROOT, APP_DIR):
+        if p not in sys.path:
+            sys.path.insert(0, p)
+
+
+def percentile(sorted_vals, q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def timeit(label: str, fn, n: int):
+    fn()  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<38} {dt / n * 1e6:9.1f} us/op   {n / dt:10.0f} ops/s")
+
+
+def report_latencies(title: str, samples: dict, wall: float):
+    """samples: endpoint -> [seconds]. Prints throughput and p50/p95/p99 per endpoint."""
+    total = sum(len(v) for v in samples.values())
+    print(f"\n{title}: {total} requests in {wall:.2f}s -> {total / wall:.1f} req/s")
+    print(f"{'endpoint':<24} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name in sorted(samples):
+        vals = sorted(samples[name])
+        print(f"{name:<24} {len(vals):>7} "
+              f"{percentile(vals, 50) * 1e3:>9.1f} {percentile(vals, 95) * 1e3:>9.1f} "
+              f"{percentile(vals, 99) * 1e3:>9.1f} {vals[-1] * 1e3:>9.1f}")
@@ -0,0 +1,61 @@
+# bench/engine_bench.py
+# Micro-benchmarks of the quiz engine hot paths (pick_item, pick_item_fisher, record_response).
+#
+#   python bench/engine_bench.py [-n 20000] [--bank-size 30000]
+#
+# --bank-size pads the topic with synthetic items to show how costs scale with the bank.
+
+import argparse
+import itertools
+
+from common import timeit, use_repo_paths
+
+use_repo_paths()
+
+import quiz.adaptive_inheritance_quiz as engine
+
+TOPIC = "inheritance oops"
+
+
+def build_bank(size: int):
+    engine.ITEM_BANK.clear()
+    engine.seed_inheritance_fallback(per_band=engine.FIXED_PER_BAND, topic=TOPIC)
+    engine.ensure_pool_size_exact(topic=TOPIC, per_band=engine.FIXED_PER_BAND)
+    extra = []
+    for i in range(max(0, size - len(engine.ITEM_BANK))):
+        band = "EMH"[i % 3]
+        extra.append(engine.make_item(TOPIC, band, f"[{band}] synthetic {i}",
+                                      ["a", "b", "c", "d"], 0, "inheritance", 20, 6))
+    engine.ITEM_BANK.add_many(extra)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Quiz engine micro-benchmarks")
+    ap.add_argument("-n", type=int, default=20000, help="iterations per case")
+    ap.add_argument("--bank-size", type=int, default=30, help="items in the topic pool")
+    args = ap.parse_args(argv)
+
+    build_bank(args.bank_size)
+    items = list(engine.ITEM_BANK.items(TOPIC, "M"))
+    seen9 = {it.id for it in items[:9]}
+    some_id = items[0].id
+    users = itertools.count()
+
+    def record():
+        n = next(users)
+        it = items[n % len(items)]
+        # a fresh session every MAX_QUESTIONS answers, as in real traffic
+        engine.record_response(f"bench{n // engine.MAX_QUESTIONS}", TOPIC, it, it.correct_index, 20.0)
+
+    print(f"engine, n={args.n}, bank={len(engine.ITEM_BANK)} items")
+    timeit("ITEM_BANK.get", lambda: engine.ITEM_BANK.get(some_id), args.n)
+    timeit("pick_item (nothing seen)", lambda: engine.pick_item(TOPIC, "M"), args.n)
+    timeit("pick_item (9 seen)", lambda: engine.pick_item(TOPIC, "M", seen9), args.n)
+    engine.pick_item_fisher(TOPIC, 0.0)   # builds the information table once per bank snapshot
+    timeit("pick_item_fisher (nothing seen)", lambda: engine.pick_item_fisher(TOPIC, 0.3), args.n)
+    timeit("pick_item_fisher (9 seen)", lambda: engine.pick_item_fisher(TOPIC, 0.3, seen9), args.n)
+    timeit("record_response", record, args.n)
+
+
+if __name__ == "__main__":
+    main()
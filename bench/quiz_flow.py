@@ -0,0 +1,158 @@
+# bench/quiz_flow.py
+# Load test of the full quiz flow: start -> next -> (hint) -> answer x10 -> explain_batch,
+# for N concurrent learners, against the FastAPI engine directly and through the Flask proxy.
+#
+#   python bench/quiz_flow.py [--learners 20] [--ai-latency 0.2] [--hint-rate 0.3] [--via both]
+#
+# The engine runs in-process under uvicorn with a stub AI client (fixed latency, no
+# network); the proxy is the quiz_proxy blueprint on a threaded werkzeug server.
+
+import argparse
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from common import report_latencies, use_repo_paths
+
+use_repo_paths()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _stub_ai(engine, latency: float):
+    class StubAI(engine.AIClient):
+        """Pretends to be a provider: sleeps `latency`, streams a few tokens."""
+
+        def __init__(self):
+            super().__init__(preferred="off")
+            self.mode = "openai"
+
+        def _openai_call(self, system, user):
+            time.sleep(latency)
+            return f"stub answer {hash(user) & 0xffff}"
+
+        def _openai_stream(self, system, user, on_delta):
+            parts = []
+            for k in range(4):
+                time.sleep(latency / 4)
+                parts.append(f"tok{k} ")
+                on_delta(parts[-1])
+            return "".join(parts).strip()
+
+    return StubAI()
+
+
+def start_engine(latency: float, cache: bool) -> str:
+    import uvicorn
+    import quiz.adaptive_inheritance_quiz as engine
+    import quiz.main as quiz_main
+
+    if not cache:
+        engine.AI_CACHE = engine.AICache(max_entries=0)
+
+    @quiz_main.app.on_event("startup")
+    def _install_stub():   # runs after boot(), replacing the real client
+        engine.AI = _stub_ai(engine, latency)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(quiz_main.app, host="127.0.0.1", port=port,
+                                           log_level="warning", timeout_keep_alive=30))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def start_proxy(engine_base: str) -> str:
+    os.environ["QUIZ_BASE"] = engine_base
+    from flask import Flask
+    from werkzeug.serving import make_server
+    from routes import quiz_proxy
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)   # no per-request access log
+    app = Flask("quiz_proxy_bench")
+    app.register_blueprint(quiz_proxy.bp)
+    port = _free_port()
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}/api/quiz"
+
+
+def run_learner(base: str, uid: str, hint_rate: float, samples, lock):
+    import requests
+
+    http = requests.Session()
+    local = defaultdict(list)
+
+    def call(name, path, body):
+        t0 = time.perf_counter()
+        r = http.post(base + path, json=body, timeout=60)
+        local[name].append(time.perf_counter() - t0)
+        r.raise_for_status()
+        return r.json()
+
+    topic = "inheritance oops"
+    call("start", "/session/start", {"user_id": uid, "topic": topic, "ai": "auto"})
+    entries = []
+    while True:
+        nxt = call("next", "/session/next", {"user_id": uid, "topic": topic})
+        if nxt["end"]:
+            break
+        it = nxt["item"]
+        used_hint = random.random() < hint_rate
+        if used_hint:
+            call("hint", "/session/hint", {"user_id": uid, "topic": topic, "item_id": it["id"]})
+        choice = it["correct_index"] if random.random() < 0.7 else (it["correct_index"] + 1) % len(it["options"])
+        call("answer", "/session/answer", {"user_id": uid, "topic": topic, "item_id": it["id"],
+                                           "choice_index": choice, "hint_used": used_hint, "time_sec": 15})
+        entries.append({"item_id": it["id"], "item_text": it["text"], "options": it["options"],
+                        "correct_index": it["correct_index"], "chosen_index": choice,
+                        "hint_used": used_hint, "time_sec": 15})
+    call("explain_batch", "/session/explain_batch", {"user_id": uid, "topic": topic, "entries": entries})
+    with lock:
+        for k, v in local.items():
+            samples[k].extend(v)
+
+
+def run_load(title: str, base: str, learners: int, hint_rate: float):
+    samples, lock = defaultdict(list), threading.Lock()
+    threads = [threading.Thread(target=run_learner, args=(base, f"{title}-{i}", hint_rate, samples, lock))
+               for i in range(learners)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report_latencies(title, samples, time.perf_counter() - t0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Quiz flow load test")
+    ap.add_argument("--learners", type=int, default=20, help="concurrent learners")
+    ap.add_argument("--ai-latency", type=float, default=0.2, help="stub AI latency per call (s)")
+    ap.add_argument("--hint-rate", type=float, default=0.3, help="probability of a hint per question")
+    ap.add_argument("--via", choices=("direct", "proxy", "both"), default="both")
+    ap.add_argument("--no-ai-cache", action="store_true", help="disable the hint/explanation cache")
+    ap.add_argument("--seed", type=int, default=7, help="seed for learner choices")
+    args = ap.parse_args(argv)
+    random.seed(args.seed)
+
+    engine_base = start_engine(args.ai_latency, cache=not args.no_ai_cache)
+    print(f"{args.learners} learners, stub AI latency {args.ai_latency * 1e3:.0f} ms, "
+          f"hint rate {args.hint_rate:.0%}")
+    if args.via in ("direct", "both"):
+        run_load("direct", engine_base, args.learners, args.hint_rate)
+    if args.via in ("proxy", "both"):
+        run_load("proxy", start_proxy(engine_base), args.learners, args.hint_rate)
+
+
+if __name__ == "__main__":
+    main()
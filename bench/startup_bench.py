@@ -0,0 +1,97 @@
+# bench/startup_bench.py
+# Cold-start report: import time and app construction for the Flask API and the quiz engine,
+# each measured in a fresh interpreter (what a new worker/replica pays).
+#
+#   python bench/startup_bench.py [--runs 3] [--top 12]
+#
+# Flask runs against a throwaway SQLite file with AUTO_MIGRATE off, like a production worker;
+# the slowest-imports table comes from `python -X importtime`.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import APP_DIR, ROOT
+
+SNIPPETS = {
+    "flask": (APP_DIR, """
+import time, json
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app()
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "init": t2 - t1}))
+"""),
+    "quiz": (ROOT, """
+import time, json
+t0 = time.perf_counter()
+import quiz.main as m
+t1 = time.perf_counter()
+m.boot()
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "init": t2 - t1}))
+"""),
+}
+IMPORTS = {"flask": "from app import create_app", "quiz": "import quiz.main"}
+
+
+def _env(tmp: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+    env["PYTHONPATH"] = os.pathsep.join([ROOT, APP_DIR, env.get("PYTHONPATH", "")])
+    return env
+
+
+def measure(name: str, runs: int, env: dict) -> dict:
+    cwd, code = SNIPPETS[name]
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {k: min(s[k] for s in samples) for k in samples[0]}   # min: least scheduler noise
+
+
+def top_imports(name: str, n: int, env: dict):
+    cwd, _ = SNIPPETS[name]
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORTS[name]], cwd=cwd, env=env,
+                         capture_output=True, text=True, check=True)
+    rows, total = [], 0
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, mod = line[len("import time:"):].split("|")
+        depth = (len(mod) - len(mod.lstrip()) - 1) // 2
+        if depth == 0:
+            total += int(cum_us)
+        elif depth == 1:   # direct imports of the entry modules: where the time actually goes
+            rows.append((int(cum_us), int(self_us), mod.strip()))
+    rows.sort(reverse=True)
+    return rows[:n], total
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Cold-start timing report")
+    ap.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement (min is reported)")
+    ap.add_argument("--top", type=int, default=12, help="slowest top-level imports to list")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(tmp)
+        print(f"{'service':<8} {'import ms':>10} {'init ms':>10}")
+        for name in SNIPPETS:
+            t = measure(name, args.runs, env)
+            print(f"{name:<8} {t['import'] * 1e3:>10.1f} {t['init'] * 1e3:>10.1f}")
+        for name in SNIPPETS:
+            rows, total = top_imports(name, args.top, env)
+            print(f"\n{name}: slowest imports ({total / 1e3:.1f} ms in all)")
+            for cum, self_us, mod in rows:
+                print(f"  {cum / 1e3:>8.1f} ms  (self {self_us / 1e3:>6.1f})  {mod}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,58 @@
 # adaptive_inheritance_quiz.py
 # Adaptive micro-quiz (MCQ) with:
 # - Fixed pool size: 30 items (10 E, 10 M, 10 H) for the chosen topic
-# - Ask only 10 questions; total session window = 300s
+# - Ask 10 questions by default within a 300s window (per-session time_limit/max_q)
 # - No repeats (seen_item_ids + enforced pool trimming)
 # - E/M/H staircase; AI hints (on demand); AI explanations generated ONCE at the end (batch)
 # - AI item generation optional; strict “inheritance” topic enforcement + curated fallback bank
+# - More topics from a precompiled bank file (quiz/bank_file.py), loaded on first use per topic
 # - Classification: SCORE-BASED (10=Excellent, 8–9=Good, 6–7=Average, ≤5=Poor)
 # - Hint penalties are SMALL and consistent across mastery/accuracy/ability/fatigue
 
 import os
+import json
 import math
+import hashlib
+import importlib.util
+import functools
 import random
 import time
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, asdict, replace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from quiz import metrics
+from quiz.ai_cache import AICache
+from quiz.bank_file import BankFile
+from quiz.event_log import EventLog
+from quiz.session_store import make_session_store
 
 # =========================
 # Config
 # =========================
-TIME_LIMIT_SECONDS = 300      # total test window
+TIME_LIMIT_SECONDS = 300      # default test window (per-session override in SessionState.time_limit)
+MAX_QUESTIONS = 10            # default questions per session (SessionState.max_q)
+SELECTION_MODE = os.environ.get("QUIZ_SELECTION", "staircase")   # staircase | fisher (SessionState.selection)
+SE_TARGET = float(os.environ.get("QUIZ_SE_TARGET", "0"))          # end once SE(ability) <= this; 0 = off
+SE_MIN_ANSWERS = int(os.environ.get("QUIZ_SE_MIN_ANSWERS", "5"))  # answers before the SE rule may end a session
+FISHER_TOP_K = int(os.environ.get("QUIZ_FISHER_TOP_K", "3"))     # fisher: random pick among the k most informative
 FIXED_PER_BAND = 10           # EXACTLY 10 per difficulty -> 30 total pool
+DEFAULT_TOPIC = "inheritance oops"
+BAND_TIME = {"E": (18.0, 6.0), "M": (22.0, 6.0), "H": (28.0, 8.0)}   # default (avg, sd) seconds per band
 
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 ANTHROPIC_MODEL = os.environ.get("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022")
 AI_TIMEOUT = 8
 AI_RETRIES = 1
 DEGRADE_ON_ERROR = True
+AI_CONCURRENCY = int(os.environ.get("AI_CONCURRENCY", "8"))                     # in-flight LLM calls per process
+EXPLAIN_DEADLINE_SECONDS = float(os.environ.get("EXPLAIN_DEADLINE_SECONDS", "10"))  # whole explain batch
+AI_CACHE_SIZE = int(os.environ.get("AI_CACHE_SIZE", "4096"))     # in-memory hint/explanation entries
+AI_CACHE_PATH = os.environ.get("AI_CACHE_PATH")                   # optional SQLite file, survives restarts
+AI_WARMUP = os.environ.get("QUIZ_AI_WARMUP", "false").lower() == "true"
 
 # --- Hint sensitivity (small penalties) ---
 HINT_CORRECT_MASTERY   = 0.90   # correct+hint mastery credit
@@ -35,15 +62,59 @@ HINT_WRONG_ACCURACY    = 0.10   # wrong+hint accuracy credit in last-5 window
 HINT_ETA_MULTIPLIER    = 0.85   # ability LR damping if hint used
 HINT_FATIGUE_RELAX_Z   = 2.0    # relax timing threshold for fatigue when hint used
 
+# --- Session storage ---
+SESSION_BACKEND = os.environ.get("QUIZ_SESSION_BACKEND", "memory")   # memory | sqlite
+SESSION_DB_PATH = os.environ.get("QUIZ_SESSION_DB", "quiz_sessions.db")
+SESSION_TTL_SECONDS = int(os.environ.get("QUIZ_SESSION_TTL", "3600"))
+SESSION_MAX_ENTRIES = int(os.environ.get("QUIZ_SESSION_MAX", "10000"))
+# Workers sharing a session store must build identical banks (same ids, same option order)
+BANK_SEED = os.environ.get("QUIZ_BANK_SEED") or ("shared" if SESSION_BACKEND == "sqlite" else None)
+
+# --- Item calibration (offline: python -m quiz.calibrate) ---
+CALIBRATION_PATH = os.environ.get("QUIZ_CALIBRATION")   # JSON written by quiz/calibrate.py
+
+# --- Item bank file (python -m quiz.bank_file compile); topics load on first use ---
+BANK_PATH = os.environ.get("QUIZ_BANK_PATH")
+PRELOAD_TOPICS = [t.strip() for t in os.environ.get("QUIZ_PRELOAD_TOPICS", DEFAULT_TOPIC).split(",") if t.strip()]
+
+# --- Response event log (served/answer/hint/end; input for quiz/calibrate.py) ---
+EVENT_LOG_DIR = os.environ.get("QUIZ_EVENT_LOG_DIR")                  # unset -> logging off
+EVENT_LOG_MAX_BYTES = int(os.environ.get("QUIZ_EVENT_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+
 # =========================
 # AI client (OpenAI / Anthropic / Fallback)
 # =========================
+_SDK_LOCK = threading.Lock()
+
+# Every provider call (hints, explanations, warmup, item generation) holds one of these slots,
+# so AI_CONCURRENCY caps in-flight LLM calls per process whatever thread makes them
+_PROVIDER_SLOTS = threading.BoundedSemaphore(max(1, AI_CONCURRENCY))
+
+def _provider_slot(provider: str):
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _PROVIDER_SLOTS.acquire(timeout=AI_TIMEOUT):
+                metrics.AI_THROTTLED.labels(provider).inc()
+                return ""   # same as a failed call, without degrading the client
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _PROVIDER_SLOTS.release()
+        return wrapper
+    return deco
+
+class AIUnavailable(Exception):
+    """The provider call failed after its retries (only raised where degrading is not wanted)."""
+
 class AIClient:
     def __init__(self, preferred: str = "auto"):
         self.mode = "fallback"
         self.status = "ok"
         self.has_openai = False
         self.has_anthropic = False
+        self._openai = None
+        self._anthropic = None
         self._init_clients(preferred)
 
     def _init_clients(self, preferred: str):
@@ -61,36 +132,53 @@ class AIClient:
             if self._try_init_anthropic(): return
         self.mode = "fallback"
 
+    # SDKs are only looked up here; importing one costs hundreds of ms, so it waits for the
+    # first real call (the properties below). Import/constructor errors then degrade that call.
     def _try_init_openai(self):
-        try:
-            from openai import OpenAI
-            self.openai = OpenAI(timeout=AI_TIMEOUT)
-            self.has_openai = True
-            self.mode = "openai"
-            return True
-        except Exception as e:
-            self.status = f"openai_init_error: {e}"
+        if importlib.util.find_spec("openai") is None:
+            self.status = "openai_init_error: openai package not installed"
             return False
+        self.has_openai = True
+        self.mode = "openai"
+        return True
 
     def _try_init_anthropic(self):
-        try:
-            import anthropic
-            self.anthropic = anthropic.Anthropic(timeout=AI_TIMEOUT)
-            self.has_anthropic = True
-            self.mode = "anthropic"
-            return True
-        except Exception as e:
-            self.status = f"anthropic_init_error: {e}"
+        if importlib.util.find_spec("anthropic") is None:
+            self.status = "anthropic_init_error: anthropic package not installed"
             return False
+        self.has_anthropic = True
+        self.mode = "anthropic"
+        return True
+
+    @property
+    def openai(self):
+        if self._openai is None:
+            with _SDK_LOCK:
+                if self._openai is None:
+                    from openai import OpenAI
+                    self._openai = OpenAI(timeout=AI_TIMEOUT)
+        return self._openai
+
+    @property
+    def anthropic(self):
+        if self._anthropic is None:
+            with _SDK_LOCK:
+                if self._anthropic is None:
+                    import anthropic
+                    self._anthropic = anthropic.Anthropic(timeout=AI_TIMEOUT)
+        return self._anthropic
 
     def _degrade(self, e: Exception):
         if DEGRADE_ON_ERROR:
+            metrics.AI_DEGRADES.labels(self.mode).inc()
             self.status = f"degraded_to_fallback: {e}"
             self.mode = "fallback"
 
     # ---- low-level calls
-    def _openai_call(self, system: str, user: str) -> str:
+    @_provider_slot("openai")
+    def _openai_call(self, system: str, user: str, degrade: bool = True) -> str:
         for attempt in range(AI_RETRIES + 1):
+            t0 = time.perf_counter()
             try:
                 resp = self.openai.responses.create(
                     model=OPENAI_MODEL,
@@ -107,12 +195,18 @@ class AIClient:
                             return block.text.strip()
                 return ""
             except Exception as e:
+                metrics.record_ai_error("openai", e, retrying=attempt < AI_RETRIES)
                 if attempt >= AI_RETRIES:
-                    self._degrade(e); return ""
-                time.sleep(0.3)
+                    if degrade: self._degrade(e)
+                    return ""
+            finally:
+                metrics.AI_LATENCY.labels("openai", "call").observe(time.perf_counter() - t0)
+            time.sleep(0.3)
 
-    def _anthropic_call(self, system: str, user: str) -> str:
+    @_provider_slot("anthropic")
+    def _anthropic_call(self, system: str, user: str, degrade: bool = True) -> str:
         for attempt in range(AI_RETRIES + 1):
+            t0 = time.perf_counter()
             try:
                 resp = self.anthropic.messages.create(
                     model=ANTHROPIC_MODEL,
@@ -126,63 +220,311 @@ class AIClient:
                     return (txt or "").strip()
                 return ""
             except Exception as e:
+                metrics.record_ai_error("anthropic", e, retrying=attempt < AI_RETRIES)
+                if attempt >= AI_RETRIES:
+                    if degrade: self._degrade(e)
+                    return ""
+            finally:
+                metrics.AI_LATENCY.labels("anthropic", "call").observe(time.perf_counter() - t0)
+            time.sleep(0.3)
+
+    # ---- token streaming (retry only while nothing has been emitted yet)
+    @_provider_slot("openai")
+    def _openai_stream(self, system: str, user: str, on_delta: Callable[[str], None]) -> str:
+        for attempt in range(AI_RETRIES + 1):
+            t0 = time.perf_counter()
+            parts: List[str] = []
+            try:
+                stream = self.openai.responses.create(
+                    model=OPENAI_MODEL,
+                    input=[{"role": "system", "content": system},
+                           {"role": "user", "content": user}],
+                    stream=True,
+                )
+                for event in stream:
+                    if getattr(event, "type", "") == "response.output_text.delta" and event.delta:
+                        parts.append(event.delta)
+                        on_delta(event.delta)
+                return "".join(parts).strip()
+            except Exception as e:
+                metrics.record_ai_error("openai", e, retrying=not parts and attempt < AI_RETRIES)
+                if parts:
+                    return "".join(parts).strip()
+                if attempt >= AI_RETRIES:
+                    self._degrade(e); return ""
+            finally:
+                metrics.AI_LATENCY.labels("openai", "stream").observe(time.perf_counter() - t0)
+            time.sleep(0.3)
+
+    @_provider_slot("anthropic")
+    def _anthropic_stream(self, system: str, user: str, on_delta: Callable[[str], None]) -> str:
+        for attempt in range(AI_RETRIES + 1):
+            t0 = time.perf_counter()
+            parts: List[str] = []
+            try:
+                with self.anthropic.messages.stream(
+                    model=ANTHROPIC_MODEL,
+                    max_tokens=350,
+                    system=system,
+                    messages=[{"role": "user", "content": user}],
+                ) as stream:
+                    for delta in stream.text_stream:
+                        if delta:
+                            parts.append(delta)
+                            on_delta(delta)
+                return "".join(parts).strip()
+            except Exception as e:
+                metrics.record_ai_error("anthropic", e, retrying=not parts and attempt < AI_RETRIES)
+                if parts:
+                    return "".join(parts).strip()
                 if attempt >= AI_RETRIES:
                     self._degrade(e); return ""
-                time.sleep(0.3)
+            finally:
+                metrics.AI_LATENCY.labels("anthropic", "stream").observe(time.perf_counter() - t0)
+            time.sleep(0.3)
+
+    def _cache_key(self, system: str, user: str) -> str:
+        # Hints/explanations are pure functions of the prompt, so identical prompts share one answer
+        model = OPENAI_MODEL if self.mode == "openai" else ANTHROPIC_MODEL
+        return AICache.key(self.mode, model, system, user)
+
+    def _cached_call(self, system: str, user: str) -> str:
+        key = self._cache_key(system, user)
+        txt = AI_CACHE.get(key)
+        if txt is not None:
+            return txt
+        txt = self._openai_call(system, user) if self.mode == "openai" else self._anthropic_call(system, user)
+        if txt:
+            AI_CACHE.put(key, txt)
+        return txt
 
     # ---- public helpers
     def generate_hint(self, stem: str, options: List[str], subskill: Optional[str]) -> str:
         system = ("Generate ONE short, actionable hint for a multiple-choice programming/OOP question. "
                   "Do NOT reveal the answer or option letter. Max 1 sentence.")
         user = f"Question: {stem}\nOptions: {options}\nSubskill/Concept: {subskill or 'inheritance'}\n"
-        if self.mode == "openai":
-            txt = self._openai_call(system, user)
-            return txt or "Focus on which class defines/overrides the method in the inheritance chain."
-        if self.mode == "anthropic":
-            txt = self._anthropic_call(system, user)
+        if self.mode in ("openai", "anthropic"):
+            txt = self._cached_call(system, user)
             return txt or "Focus on which class defines/overrides the method in the inheritance chain."
         return "Check which class actually defines or overrides the attribute/method being accessed."
 
-    def generate_explanation(self, stem: str, options: List[str], correct_idx: int, chosen_idx: int) -> str:
+    @staticmethod
+    def _explanation_prompt(stem: str, options: List[str], correct_idx: int, chosen_idx: int) -> Tuple[str, str]:
         system = ("You are a tutor. Give a 2–3 line explanation. "
                   "First, why the correct option is right; then one reason the chosen wrong option is misleading. "
                   "Be concise and concrete.")
         user = (f"Question: {stem}\nOptions: {options}\n"
                 f"Correct option index: {correct_idx}\nStudent chose index: {chosen_idx}\n")
-        if self.mode == "openai":
-            txt = self._openai_call(system, user)
-            return txt or self._fallback_expl(correct_idx, chosen_idx)
-        if self.mode == "anthropic":
-            txt = self._anthropic_call(system, user)
+        return system, user
+
+    def generate_explanation(self, stem: str, options: List[str], correct_idx: int, chosen_idx: int) -> str:
+        system, user = self._explanation_prompt(stem, options, correct_idx, chosen_idx)
+        if self.mode in ("openai", "anthropic"):
+            txt = self._cached_call(system, user)
             return txt or self._fallback_expl(correct_idx, chosen_idx)
         return self._fallback_expl(correct_idx, chosen_idx)
 
+    def stream_explanation(self, stem: str, options: List[str], correct_idx: int, chosen_idx: int,
+                           on_delta: Callable[[str], None]) -> str:
+        """Like generate_explanation, but reports text to `on_delta` as the provider produces it."""
+        system, user = self._explanation_prompt(stem, options, correct_idx, chosen_idx)
+        if self.mode not in ("openai", "anthropic"):
+            return self._fallback_expl(correct_idx, chosen_idx)
+        key = self._cache_key(system, user)
+        txt = AI_CACHE.get(key)
+        if txt is not None:
+            return txt
+        if self.mode == "openai":
+            txt = self._openai_stream(system, user, on_delta)
+        else:
+            txt = self._anthropic_stream(system, user, on_delta)
+        if txt:
+            AI_CACHE.put(key, txt)
+        return txt or self._fallback_expl(correct_idx, chosen_idx)
+
     def _fallback_expl(self, correct_idx: int, chosen_idx: int) -> str:
         if chosen_idx == correct_idx:
             return "Correct: this aligns with how inheritance resolves methods/attributes along the base→subclass chain."
         return ("Correct option reflects the actual method resolution or override rules in the hierarchy. "
                 "The chosen option ignores which class defines or overrides the behavior.")
 
-    def generate_mcq(self, topic: str, difficulty: str, subskill: Optional[str]) -> Dict[str, object]:
-        # Fallback-only or minimal AI; we have a robust offline bank anyway.
-        stem, options, idx = get_inheritance_fallback_item_random(difficulty)
-        return {"stem": stem, "options": options, "correct_index": idx, "subskill": subskill or "inheritance"}
+    def generate_mcq(self, topic: str, difficulty: str, subskill: Optional[str],
+                     avoid: Tuple[str, ...] = ()) -> Optional[Dict[str, object]]:
+        """One new MCQ from the provider (uncached: every call should be a fresh item).
+
+        Without a provider this returns a curated fallback item. Returns None when the
+        reply is not usable JSON; content checks are left to validate_mcq. A failed call
+        raises AIUnavailable and, unlike hints/explanations, does not degrade the client.
+        """
+        if self.mode not in ("openai", "anthropic"):
+            stem, options, idx = get_inheritance_fallback_item_random(difficulty)
+            return {"stem": stem, "options": options, "correct_index": idx, "subskill": subskill or "inheritance"}
+        level = {"E": "easy", "M": "medium", "H": "hard"}.get(difficulty, "medium")
+        system = (f"Write ONE {level} multiple-choice question for a programming quiz. "
+                  f"Exactly {MCQ_OPTIONS} options, exactly one correct, no 'all/none of the above'. "
+                  'Reply with JSON only: {"stem": str, "options": [str, ...], "correct_index": int}')
+        user = f"Topic: {topic}\nSubskill/Concept: {subskill or topic}\n"
+        if avoid:
+            user += "Do not repeat these questions:\n" + "\n".join(f"- {a}" for a in avoid) + "\n"
+        call = self._openai_call if self.mode == "openai" else self._anthropic_call
+        txt = call(system, user, degrade=False)
+        if not txt:
+            raise AIUnavailable(self.mode)
+        try:
+            data = json.loads(txt[txt.index("{"):txt.rindex("}") + 1])
+            return {"stem": str(data["stem"]).strip(), "options": [str(o).strip() for o in data["options"]],
+                    "correct_index": int(data["correct_index"]), "subskill": subskill}
+        except (ValueError, KeyError, TypeError):
+            return None
 
 # Initialized in main()
 AI: "AIClient" = None
+AI_MODES = ("auto", "openai", "anthropic", "off")   # values of SessionState.ai_mode
+_AI_BY_MODE: Dict[str, "AIClient"] = {}
+
+def get_ai(mode: str = "auto") -> "AIClient":
+    """AI client for a session's `ai` setting; "auto" is the shared client built at boot.
+
+    Unknown modes are treated as "auto", so at most one client per mode is ever cached.
+    """
+    if mode not in AI_MODES:
+        mode = "auto"
+    if mode == "auto" and AI is not None:
+        return AI
+    client = _AI_BY_MODE.get(mode)
+    if client is None:
+        client = _AI_BY_MODE.setdefault(mode, AIClient(preferred=mode))
+    return client
+AI_CACHE = AICache(max_entries=AI_CACHE_SIZE, path=AI_CACHE_PATH)
+# Fans out explanation batches; the provider-wide cap is _PROVIDER_SLOTS
+AI_POOL = ThreadPoolExecutor(max_workers=AI_CONCURRENCY, thread_name_prefix="ai")
+
+def explain_entries(entries: List[Tuple[str, List[str], int, int]],
+                    deadline: float = EXPLAIN_DEADLINE_SECONDS,
+                    ai: Optional["AIClient"] = None) -> List[Tuple[str, bool]]:
+    """Explain (stem, options, correct_idx, chosen_idx) entries concurrently.
+
+    Returns (explanation, partial) per entry, in order. Entries not finished
+    within `deadline` seconds get the fallback explanation and partial=True.
+    """
+    client = ai or get_ai()
+    if client.mode == "fallback":
+        return [(client._fallback_expl(c, ch), False) for _, _, c, ch in entries]
+    futures = [AI_POOL.submit(client.generate_explanation, *e) for e in entries]
+    done, _ = wait(futures, timeout=deadline)
+    out = []
+    for fut, (_, _, c, ch) in zip(futures, entries):
+        if fut in done and fut.exception() is None:
+            out.append((fut.result(), False))
+        else:
+            fut.cancel()
+            out.append((client._fallback_expl(c, ch), True))
+    return out
+
+def stream_explain_entries(entries: List[Tuple[str, List[str], int, int]],
+                           deadline: float = EXPLAIN_DEADLINE_SECONDS,
+                           ai: Optional["AIClient"] = None) -> Iterator[Tuple]:
+    """Explain entries concurrently, yielding events as soon as they happen.
+
+    Yields ("token", idx, delta) while a provider streams, then exactly one
+    ("explanation", idx, text, partial) per entry, in completion order.
+    Entries still running at the deadline get the fallback text, partial=True.
+    """
+    client = ai or get_ai()
+    events: "queue.Queue[Tuple]" = queue.Queue()
+
+    def run(i: int, stem: str, options: List[str], c: int, ch: int):
+        try:
+            txt = client.stream_explanation(stem, options, c, ch, lambda d: events.put(("token", i, d)))
+        except Exception:
+            txt = None
+        events.put(("done", i, txt))
+
+    futures = [AI_POOL.submit(run, i, *e) for i, e in enumerate(entries)]
+    pending = set(range(len(entries)))
+    stop_at = time.monotonic() + deadline
+    while pending:
+        remaining = stop_at - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            ev = events.get(timeout=remaining)
+        except queue.Empty:
+            break
+        i = ev[1]
+        if i not in pending:
+            continue
+        if ev[0] == "token":
+            yield ev
+        else:
+            pending.discard(i)
+            _, _, c, ch = entries[i]
+            txt = ev[2]
+            yield ("explanation", i, txt or client._fallback_expl(c, ch), txt is None)
+    for i in sorted(pending):
+        futures[i].cancel()
+        _, _, c, ch = entries[i]
+        yield ("explanation", i, client._fallback_expl(c, ch), True)
+
+def warmup_ai_cache(items: List["Item"], workers: int = 2) -> int:
+    """Precompute hints and wrong-choice explanations for `items` in the background.
+
+    Uses its own small pool so warmup never queues ahead of live requests.
+    Returns the number of prompts submitted.
+    """
+    if AI is None or AI.mode == "fallback":
+        return 0
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-warmup")
+    n = 0
+    for it in items:
+        pool.submit(AI.generate_hint, it.text, it.options, it.subskill); n += 1
+        for chosen in range(len(it.options)):
+            if chosen != it.correct_index:
+                pool.submit(AI.generate_explanation, it.text, it.options, it.correct_index, chosen); n += 1
+    pool.shutdown(wait=False)
+    return n
 
 # =========================
 # Validation & topic enforcement (kept simple; we use curated bank)
 # =========================
 def topic_keywords_for(topic: str) -> List[str]:
+    if BANK_FILE is not None and topic in BANK_FILE:
+        return BANK_FILE.keywords(topic)
     t = topic.lower()
     if "inherit" in t:
         return ["inherit", "override", "polymorph", "mro", "base class", "subclass", "virtual"]
     return []
 
+MCQ_OPTIONS = 4   # every curated item has four options; generated ones must match
+
+def normalize_stem(stem: str) -> str:
+    """Dedupe key for stems: drops the "[E] " band prefix, case, punctuation and spacing."""
+    t = stem.lower()
+    if len(t) > 3 and t[0] == "[" and t[2] == "]":
+        t = t[3:]
+    return " ".join("".join(ch if ch.isalnum() else " " for ch in t).split())
+
+def validate_mcq(topic: str, mcq: Optional[Dict[str, object]], known_stems: set) -> Optional[str]:
+    """None if `mcq` may enter the bank, else the rejection reason."""
+    if not mcq or not mcq.get("stem"):
+        return "malformed"
+    options = mcq.get("options") or []
+    if len(options) != MCQ_OPTIONS or len({normalize_stem(o) for o in options}) != MCQ_OPTIONS:
+        return "options"
+    if not 0 <= int(mcq.get("correct_index", -1)) < len(options):
+        return "answer_index"
+    kws = topic_keywords_for(topic)
+    text = (str(mcq["stem"]) + " " + " ".join(options)).lower()
+    if kws and not any(k in text for k in kws):
+        return "off_topic"
+    if normalize_stem(str(mcq["stem"])) in known_stems:
+        return "duplicate"
+    return None
+
 # =========================
 # Inheritance fallback bank (≥12 per band; we sample 10)
 # =========================
+@functools.lru_cache(maxsize=None)   # built once; callers copy before shuffling
 def _inheritance_bank():
     return {
         "E": [
@@ -286,72 +628,454 @@ class Item:
     subskill: Optional[str] = None
     hint: Optional[str] = None
     is_review: bool = False
+    key: str = ""                 # content key, stable across restarts (see item_key)
+    b: Optional[float] = None     # calibrated difficulty; None -> B_MAP[difficulty]
 
-ITEM_BANK: List[Item] = []
-CORRECT_MAP: Dict[str, int] = {}
+def item_key(topic: str, text: str) -> str:
+    """Content-derived item key; ids are per-boot, keys survive restarts and reshuffles."""
+    return hashlib.sha1(f"{topic}\x1f{text}".encode("utf-8")).hexdigest()[:16]
 
-def add_item(topic: str, difficulty: str, stem: str, options: List[str], correct_index: int,
-             subskill: Optional[str], avg_time: float, sd_time: float):
-    # Shuffle options so correct answer isn't always A
-    shuffled = options[:]
-    random.shuffle(shuffled)
+# =========================
+# Item information (Rasch: p = sigmoid(ability - b), I = p * (1 - p))
+# =========================
+B_MAP = {'E': -1.5, 'M': 0.0, 'H': 1.0}
+THETA_PRIOR_VAR = 1.0   # ability prior N(0, 1), as in quiz/calibrate.py
+INFO_GRID_STEP = 0.25
+INFO_GRID = tuple(i * INFO_GRID_STEP for i in range(-16, 17))   # abilities -4 .. 4
+INFO_TIE_EPS = 1e-3   # items this close in information count as tied (e.g. uncalibrated items of a band)
+
+def sigmoid(x: float) -> float: return 1.0 / (1.0 + math.exp(-x))
+def item_b(it: "Item") -> float: return it.b if it.b is not None else B_MAP[it.difficulty]
+def item_info(b: float, ability: float) -> float:
+    p = sigmoid(ability - b)
+    return p * (1.0 - p)
+def grid_index(ability: float) -> int:
+    i = round((ability - INFO_GRID[0]) / INFO_GRID_STEP)
+    return min(len(INFO_GRID) - 1, max(0, i))
+
+class _BankIndex:
+    """Immutable snapshot of the bank's indexes (buckets are tuples)."""
+    __slots__ = ("by_id", "by_topic", "by_band", "by_subskill", "_info")
+
+    def __init__(self, items: List[Item]):
+        self.by_id: Dict[str, Item] = {}
+        for it in items:
+            self.by_id[it.id] = it
+        by_topic: Dict[str, List[Item]] = {}
+        by_band: Dict[Tuple[str, str], List[Item]] = {}
+        by_subskill: Dict[Tuple[str, str], List[Item]] = {}
+        for it in self.by_id.values():
+            by_topic.setdefault(it.topic, []).append(it)
+            by_band.setdefault((it.topic, it.difficulty), []).append(it)
+            if it.subskill:
+                by_subskill.setdefault((it.topic, it.subskill), []).append(it)
+        self.by_topic = {k: tuple(v) for k, v in by_topic.items()}
+        self.by_band = {k: tuple(v) for k, v in by_band.items()}
+        self.by_subskill = {k: tuple(v) for k, v in by_subskill.items()}
+        self._info: Dict[str, Tuple[Tuple[Item, ...], ...]] = {}
+
+    def info_order(self, topic: str) -> Tuple[Tuple[Tuple[Tuple[Item, ...], frozenset], ...], ...]:
+        """Per INFO_GRID point, the topic's items by descending information, as groups of
+        tied items (within INFO_TIE_EPS): ((items, their ids), ...).
+
+        Built on first use and kept with the snapshot (a write builds a new one).
+        """
+        order = self._info.get(topic)
+        if order is None:
+            items = self.by_topic.get(topic, ())
+            order = tuple(self._tie_groups(items, theta) for theta in INFO_GRID)
+            self._info[topic] = order
+        return order
+
+    @staticmethod
+    def _tie_groups(items, theta: float):
+        ranked = sorted(((item_info(item_b(it), theta), it) for it in items), key=lambda pair: -pair[0])
+        groups, cur, head = [], [], None
+        for info, it in ranked:
+            if cur and info < head - INFO_TIE_EPS:
+                groups.append(cur); cur = []
+            if not cur: head = info
+            cur.append(it)
+        if cur: groups.append(cur)
+        return tuple((tuple(g), frozenset(it.id for it in g)) for g in groups)
+
+class ItemBank:
+    """Indexed item store.
+
+    Keeps an id -> item dict plus prebuilt buckets per topic, per
+    (topic, difficulty) and per (topic, subskill), so lookups and draws never
+    scan the whole bank. Writes are copy-on-write: a new index snapshot is built
+    under a lock and swapped in, so readers never lock and never see a half-applied
+    write. Batch writes with add_many/replace_topic.
+    """
+
+    def __init__(self):
+        self._idx = _BankIndex([])
+        self._write_lock = threading.Lock()
+        # per-topic and monotonic: ids stay unique after trimming and do not depend on
+        # the order in which topics were loaded (workers sharing sessions agree on them)
+        self._seq: Dict[str, Iterator[int]] = {}
+
+    def __len__(self) -> int: return len(self._idx.by_id)
+    def __iter__(self): return iter(self._idx.by_id.values())
+    def __contains__(self, item_id: str) -> bool: return item_id in self._idx.by_id
+
+    def next_id(self, topic: str, difficulty: str) -> str:
+        with self._write_lock:
+            seq = self._seq.setdefault(topic, itertools.count())
+        return f"{difficulty}-{topic}-{next(seq)}"
+
+    def get(self, item_id: str) -> Optional[Item]:
+        return self._idx.by_id.get(item_id)
+
+    def correct_index(self, item_id: str) -> Optional[int]:
+        it = self._idx.by_id.get(item_id)
+        return it.correct_index if it else None
+
+    def add(self, it: Item):
+        self.add_many([it])
+
+    def _swap(self, idx: _BankIndex):
+        self._idx = idx
+        metrics.ITEM_BANK_SIZE.set(len(idx.by_id))
+
+    def add_many(self, items: List[Item]):
+        with self._write_lock:
+            self._swap(_BankIndex(list(self._idx.by_id.values()) + list(items)))
+
+    def clear(self):
+        with self._write_lock:
+            self._swap(_BankIndex([]))
+            self._seq = {}
+
+    def replace_topic(self, topic: str, items: List[Item]):
+        """Swap the whole pool of `topic` for `items` (other topics untouched)."""
+        with self._write_lock:
+            keep = [it for it in self._idx.by_id.values() if it.topic != topic]
+            self._swap(_BankIndex(keep + list(items)))
+
+    def items(self, topic: str, difficulty: Optional[str] = None,
+              subskill: Optional[str] = None) -> Tuple[Item, ...]:
+        idx = self._idx
+        if subskill is not None:
+            return idx.by_subskill.get((topic, subskill), ())
+        if difficulty is not None:
+            return idx.by_band.get((topic, difficulty), ())
+        return idx.by_topic.get(topic, ())
+
+    def draw(self, topic: str, difficulty: Optional[str] = None,
+             exclude_ids: Optional[set] = None, rng: random.Random = random) -> Optional[Item]:
+        """Uniformly draw an item not in `exclude_ids` without copying the bucket.
+
+        A few rejection-sampling tries cover the common case (few items seen);
+        a single reservoir pass over the bucket handles heavily-seen pools.
+        """
+        bucket = self.items(topic, difficulty)
+        if not bucket:
+            return None
+        if not exclude_ids:
+            return rng.choice(bucket)
+        for _ in range(8):
+            it = bucket[rng.randrange(len(bucket))]
+            if it.id not in exclude_ids:
+                return it
+        chosen, n = None, 0
+        for it in bucket:
+            if it.id in exclude_ids:
+                continue
+            n += 1
+            if rng.randrange(n) == 0:
+                chosen = it
+        return chosen
+
+    def most_informative(self, topic: str, ability: float, exclude_ids: Optional[set] = None,
+                         k: int = 1, rng: random.Random = random) -> Optional[Item]:
+        """A random pick among the `k` most informative unseen items at `ability`, widened to
+        every item tied with the k-th, so ties do not favour bank order.
+
+        Walks tie groups, not items: the cost is the number of groups needed plus a few
+        rejection-sampling tries, even when a whole uncalibrated band is one tie.
+        """
+        if not self.items(topic):
+            return None
+        exclude_ids = exclude_ids or set()
+        picked, total = [], 0
+        for group, ids in self._idx.info_order(topic)[grid_index(ability)]:
+            unseen = len(group) - len(ids & exclude_ids)
+            if unseen:
+                picked.append((group, unseen))
+                total += unseen
+                if total >= k: break
+        if not picked:
+            return None
+        r = rng.randrange(total)
+        for group, unseen in picked:   # a group with probability unseen / total ...
+            if r < unseen: break
+            r -= unseen
+        while True:                    # ... then uniformly among its unseen items
+            it = group[rng.randrange(len(group))]
+            if it.id not in exclude_ids:
+                return it
+
+ITEM_BANK = ItemBank()
+BANK_RNG = random.Random(BANK_SEED)   # picks which records fill the pool; boot() reseeds it
+
+def make_item(topic: str, difficulty: str, stem: str, options: List[str], correct_index: int,
+              subskill: Optional[str], avg_time: float, sd_time: float) -> Item:
+    # Shuffle options so correct answer isn't always A. Seeded by the content key: an item shows
+    # the same option order in every worker and after restarts, so its hint/explanation prompts
+    # (and AI cache keys) are the same everywhere.
+    key = item_key(topic, stem)
+    shuffled = list(options)
+    random.Random(key).shuffle(shuffled)
     new_correct_index = shuffled.index(options[correct_index])
-    iid = f"{difficulty}-{topic}-{len(ITEM_BANK)}"
     it = Item(
-        id=iid, topic=topic, difficulty=difficulty, text=stem,
+        id=ITEM_BANK.next_id(topic, difficulty), topic=topic, difficulty=difficulty, text=stem,
         options=shuffled, correct_index=new_correct_index,
-        avg_time_sec=avg_time, sd_time_sec=sd_time, subskill=subskill
+        avg_time_sec=avg_time, sd_time_sec=sd_time, subskill=subskill,
+        key=key,
+    )
+    return _calibrated(it)
+
+# =========================
+# Calibration (parameters estimated offline by quiz/calibrate.py)
+# =========================
+CALIBRATION: Dict[str, Dict[str, float]] = {}   # item key -> {"b", "avg_time_sec", "sd_time_sec"}
+
+def _calibrated(it: Item) -> Item:
+    p = CALIBRATION.get(it.key)
+    if not p:
+        return it
+    return replace(it, b=p.get("b", it.b),
+                   avg_time_sec=p.get("avg_time_sec", it.avg_time_sec),
+                   sd_time_sec=p.get("sd_time_sec", it.sd_time_sec))
+
+def load_calibration(path: str) -> int:
+    """Load calibrated parameters; applies to items already in the bank and to items built later.
+
+    Returns the number of bank items updated.
+    """
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    CALIBRATION.clear()
+    CALIBRATION.update(data.get("items", {}))
+    updated = [_calibrated(it) for it in ITEM_BANK if it.key in CALIBRATION]
+    if updated:
+        ITEM_BANK.add_many(updated)
+    return len(updated)
+
+def add_item(topic: str, difficulty: str, stem: str, options: List[str], correct_index: int,
+             subskill: Optional[str], avg_time: float, sd_time: float) -> Item:
+    it = make_item(topic, difficulty, stem, options, correct_index, subskill, avg_time, sd_time)
+    ITEM_BANK.add(it)
+    return it
+
+# A source record is [stem, options, correct_index, subskill, avg_time_sec, sd_time_sec]
+def _topic_source(topic: str) -> Optional[Dict[str, List[list]]]:
+    """Raw records per band for `topic`: the bank file first, then the built-in bank."""
+    if BANK_FILE is not None and topic in BANK_FILE:
+        return {band: BANK_FILE.records(topic, band) for band in ("E", "M", "H")}
+    if topic == DEFAULT_TOPIC:
+        return {band: [[stem, options, idx, "inheritance", None, None] for stem, options, idx in rows]
+                for band, rows in _inheritance_bank().items()}
+    return None
+
+def _has_source(topic: str) -> bool:
+    return (BANK_FILE is not None and topic in BANK_FILE) or topic == DEFAULT_TOPIC
+
+def _item_from_record(topic: str, band: str, rec: list) -> Item:
+    stem, options, idx, subskill, avg, sd = rec
+    return make_item(
+        topic=topic, difficulty=band,
+        stem=f"[{band}] {stem}",
+        options=options, correct_index=idx,
+        subskill=subskill or (BANK_FILE.subskill(topic) if BANK_FILE is not None else None),
+        avg_time=avg or BAND_TIME[band][0],
+        sd_time=sd or BAND_TIME[band][1],
     )
-    ITEM_BANK.append(it)
-    CORRECT_MAP[iid] = new_correct_index
+
+def seed_topic(topic: str, per_band: int, rng: Optional[random.Random] = None) -> int:
+    """Add up to `per_band` random items per band from the topic's source; returns items added."""
+    src = _topic_source(topic)
+    if not src:
+        return 0
+    rng = rng or BANK_RNG
+    items: List[Item] = []
+    for band in ("E", "M", "H"):
+        pool = list(src.get(band, []))
+        rng.shuffle(pool)
+        items.extend(_item_from_record(topic, band, rec) for rec in pool[:per_band])
+    ITEM_BANK.add_many(items)
+    return len(items)
 
 def seed_inheritance_fallback(per_band: int, topic: str):
-    bank = _inheritance_bank()
+    src = _topic_source(DEFAULT_TOPIC)
+    items: List[Item] = []
     for band in ("E", "M", "H"):
-        pool = bank[band][:]
-        random.shuffle(pool)
-        for i in range(min(per_band, len(pool))):
-            stem, options, idx = pool[i]
-            add_item(
-                topic=topic, difficulty=band,
-                stem=f"[{band}] {stem}",
-                options=options, correct_index=idx,
-                subskill="inheritance",
-                avg_time=(18 if band=='E' else 22 if band=='M' else 28),
-                sd_time=(6 if band!='H' else 8)
-            )
-
-def ensure_pool_size_exact(topic: str, per_band: int = FIXED_PER_BAND):
-    global ITEM_BANK
-    new_bank: List[Item] = []
-    by_band: Dict[str, List[Item]] = {'E': [], 'M': [], 'H': []}
-    for it in ITEM_BANK:
-        if it.topic == topic and it.difficulty in by_band:
-            by_band[it.difficulty].append(it)
+        pool = src[band][:]
+        BANK_RNG.shuffle(pool)
+        items.extend(_item_from_record(topic, band, rec) for rec in pool[:per_band])
+    ITEM_BANK.add_many(items)
+
+def ensure_pool_size_exact(topic: str, per_band: int = FIXED_PER_BAND, rng: Optional[random.Random] = None):
+    rng = rng or BANK_RNG
+    src = _topic_source(topic) or _topic_source(DEFAULT_TOPIC)
+    kept: List[Item] = []
     for band in ('E','M','H'):
-        lst = by_band[band]
-        random.shuffle(lst)
-        if len(lst) > per_band:
-            lst = lst[:per_band]
-        elif len(lst) < per_band:
-            need = per_band - len(lst)
-            fallback_pool = _inheritance_bank()[band][:]
-            random.shuffle(fallback_pool)
-            for i in range(need):
-                stem, options, idx = fallback_pool[i % len(fallback_pool)]
-                add_item(
-                    topic=topic, difficulty=band,
-                    stem=f"[{band}] {stem}",
-                    options=options, correct_index=idx,
-                    subskill="inheritance",
-                    avg_time=(18 if band=='E' else 22 if band=='M' else 28),
-                    sd_time=(6 if band!='H' else 8)
-                )
-            lst = [it for it in ITEM_BANK if it.topic == topic and it.difficulty == band]
-            random.shuffle(lst)
-            lst = lst[:per_band]
-        new_bank.extend(lst)
-    ITEM_BANK = new_bank
+        lst = list(ITEM_BANK.items(topic, band))
+        fallback_pool = list(src.get(band, []))
+        if len(lst) < per_band and fallback_pool:
+            rng.shuffle(fallback_pool)
+            for i in range(per_band - len(lst)):
+                lst.append(_item_from_record(topic, band, fallback_pool[i % len(fallback_pool)]))
+        rng.shuffle(lst)
+        kept.extend(lst[:per_band])
+    ITEM_BANK.replace_topic(topic, kept)
+
+# =========================
+# Lazy topic loading
+# =========================
+BANK_FILE: Optional[BankFile] = None
+_LOADED_TOPICS: set = set()
+_TOPIC_LOAD_LOCK = threading.Lock()
+
+def open_bank_file(path: str) -> List[str]:
+    """Map a compiled bank; only its index is read now. Returns the topics it holds."""
+    global BANK_FILE
+    BANK_FILE = BankFile(path)
+    return BANK_FILE.topics()
+
+def reset_topics():
+    """Forget loaded topics (the bank itself is cleared separately)."""
+    with _TOPIC_LOAD_LOCK:
+        _LOADED_TOPICS.clear()
+
+def ensure_topic(topic: str, per_band: int = FIXED_PER_BAND) -> bool:
+    """Build `topic`'s pool the first time it is asked for; True if it has items.
+
+    Each topic gets its own RNG and id sequence, so the pool is the same in every
+    worker regardless of which topics were requested before. Only topics with a
+    source are remembered, so arbitrary client topic strings leave nothing behind.
+    """
+    if topic in _LOADED_TOPICS or not _has_source(topic):
+        return bool(ITEM_BANK.items(topic))
+    with _TOPIC_LOAD_LOCK:
+        if topic not in _LOADED_TOPICS:
+            rng = random.Random(f"{BANK_SEED}:{topic}") if BANK_SEED else random.Random()
+            seed_topic(topic, per_band, rng)
+            ensure_pool_size_exact(topic, per_band, rng)
+            if GENERATOR is not None:   # pre-generate so fresh items exist before supply runs low
+                for band in ("E", "M", "H"):
+                    GENERATOR.request(topic, band)
+            _LOADED_TOPICS.add(topic)
+    return bool(ITEM_BANK.items(topic))
+
+# =========================
+# Background item generation (never on the request path)
+# =========================
+GEN_ENABLED = os.environ.get("QUIZ_AI_GENERATE", "false").lower() == "true"
+GEN_LOW_WATER = int(os.environ.get("QUIZ_GEN_LOW_WATER", "3"))       # refill when a session has fewer unseen in a band
+GEN_BATCH = int(os.environ.get("QUIZ_GEN_BATCH", "5"))               # items requested per refill
+GEN_MAX_PER_BAND = int(os.environ.get("QUIZ_GEN_MAX_PER_BAND", "200"))  # stop growing a band past this
+GEN_WORKERS = int(os.environ.get("QUIZ_GEN_WORKERS", "2"))
+
+class ItemGenerator:
+    """Refills (topic, band) pools from the LLM on background threads.
+
+    request() only enqueues (deduplicated per band) and never blocks, so next_item
+    can call it on every draw. Workers generate a batch, validate each item against
+    the topic keywords, the option count and every stem already in the topic, and
+    publish the survivors with one ITEM_BANK.add_many.
+
+    Generated items live in this process only; with a shared session store, route a
+    session's requests to one worker or leave generation off. The generator has its own
+    AIClient and a failed call never degrades it, so background failures cannot switch
+    learners' hints and explanations to fallback.
+    """
+
+    def __init__(self, workers: int = GEN_WORKERS, batch: int = GEN_BATCH,
+                 max_per_band: int = GEN_MAX_PER_BAND, ai: Optional["AIClient"] = None):
+        self.batch = batch
+        self.max_per_band = max_per_band
+        self.ai = ai if ai is not None else AIClient()
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._run, name=f"itemgen-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def request(self, topic: str, band: str) -> bool:
+        with self._lock:
+            if (topic, band) in self._pending:
+                return False
+            self._pending.add((topic, band))
+        self._queue.put_nowait((topic, band))
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            topic, band = self._queue.get()
+            try:
+                self.refill(topic, band)
+            except Exception:
+                metrics.ITEMS_GENERATED.labels("error").inc()
+            finally:
+                with self._lock:
+                    self._pending.discard((topic, band))
+
+    def refill(self, topic: str, band: str) -> List[Item]:
+        client = self.ai
+        if client.mode == "fallback":
+            return []
+        have = ITEM_BANK.items(topic, band)
+        n = min(self.batch, self.max_per_band - len(have))
+        if n <= 0:
+            return []
+        known = {normalize_stem(it.text) for it in ITEM_BANK.items(topic)}
+        avoid = tuple(it.text[4:] if it.text.startswith(f"[{band}] ") else it.text for it in have[-20:])
+        subskill = BANK_FILE.subskill(topic) if BANK_FILE is not None and topic in BANK_FILE else None
+        items: List[Item] = []
+        for _ in range(n):
+            try:
+                mcq = client.generate_mcq(topic, band, subskill or ("inheritance" if topic == DEFAULT_TOPIC else None), avoid)
+            except AIUnavailable:
+                metrics.ITEMS_GENERATED.labels("error").inc()
+                break   # provider failing: the next request retries
+            reason = validate_mcq(topic, mcq, known)
+            metrics.ITEMS_GENERATED.labels(reason or "accepted").inc()
+            if reason:
+                continue
+            known.add(normalize_stem(mcq["stem"]))
+            it = _item_from_record(
+                topic, band, [mcq["stem"], mcq["options"], int(mcq["correct_index"]), mcq.get("subskill"), None, None])
+            # content-keyed id: sequence numbers would collide with other workers' generated items
+            items.append(replace(it, id=f"{band}-{topic}-g{it.key}"))
+        if items:
+            ITEM_BANK.add_many(items)
+        return items
+
+GENERATOR: Optional[ItemGenerator] = None
+
+def start_generator(**kwargs) -> ItemGenerator:
+    global GENERATOR
+    if GENERATOR is None:
+        GENERATOR = ItemGenerator(**kwargs)
+    return GENERATOR
+
+def maybe_refill(topic: str, band: str, seen_ids: set):
+    """Queue a refill if fewer than GEN_LOW_WATER items of `band` are unseen by this session."""
+    if GENERATOR is None:
+        return
+    size = len(ITEM_BANK.items(topic, band))
+    seen = sum(1 for i in seen_ids if i.startswith(f"{band}-"))   # ids are "<band>-<topic>-<n>"
+    if size - seen < GEN_LOW_WATER:
+        GENERATOR.request(topic, band)
 
 # =========================
 # Session state & helpers
@@ -374,22 +1098,94 @@ class SessionState:
     seen_item_ids: set = field(default_factory=set)
     wrong_subskill_counts: Dict[str, int] = field(default_factory=dict)
     h_wrong_streak: int = 0
+    last_answered_item_id: Optional[str] = None   # makes a repeated answer (double-click) a no-op
+    # Per-session configuration (set by /session/start)
+    time_limit: float = TIME_LIMIT_SECONDS
+    max_q: int = MAX_QUESTIONS
+    ai_mode: str = "auto"
+    selection: str = SELECTION_MODE    # "staircase" (band walk) | "fisher" (max information at ability)
+    se_target: float = SE_TARGET       # end once ability_se() <= se_target; 0 = off
+    answered_b: List[float] = field(default_factory=list)   # difficulty of each answered item
+    answered_x: List[int] = field(default_factory=list)     # 1 if that answer was correct
+    end_reason: Optional[str] = None
 
-SESSIONS: Dict[str, SessionState] = {}
+def _dump_state(s: SessionState) -> str:
+    d = asdict(s)
+    d["seen_item_ids"] = sorted(s.seen_item_ids)
+    return json.dumps(d, separators=(",", ":"))
+
+def _load_state(raw: str) -> SessionState:
+    d = json.loads(raw)
+    d["seen_item_ids"] = set(d.get("seen_item_ids") or ())
+    return SessionState(**d)
+
+SESSIONS = make_session_store(
+    SESSION_BACKEND, _dump_state, _load_state,
+    ttl_seconds=SESSION_TTL_SECONDS, max_entries=SESSION_MAX_ENTRIES,
+    path=os.path.abspath(SESSION_DB_PATH),
+)
 def session_key(user, topic): return f"{user}::{topic}"
 def get_session_state(user, topic) -> SessionState:
     key = session_key(user, topic)
-    if key not in SESSIONS:
-        SESSIONS[key] = SessionState(user=user, topic=topic)
-    return SESSIONS[key]
-def save_session_state(s: SessionState): SESSIONS[session_key(s.user, s.topic)] = s
+    s = SESSIONS.get(key)
+    if s is None:
+        s = SessionState(user=user, topic=topic)
+        SESSIONS.put(key, s)
+    return s
+def save_session_state(s: SessionState): SESSIONS.put(session_key(s.user, s.topic), s)
+
+# Striped per-session locks: requests for one session are serialized, different
+# sessions rarely share a stripe. In-process only; the sqlite store is last-writer-wins
+# across workers.
+SESSION_LOCK_STRIPES = 64
+_SESSION_LOCKS = [threading.RLock() for _ in range(SESSION_LOCK_STRIPES)]
+def session_lock(user, topic) -> "threading.RLock":
+    return _SESSION_LOCKS[hash(session_key(user, topic)) % SESSION_LOCK_STRIPES]
 
-B_MAP = {'E': -1.5, 'M': 0.0, 'H': 1.0}
-def sigmoid(x: float) -> float: return 1.0 / (1.0 + math.exp(-x))
 def now() -> float: return time.time()
 def time_remaining(s: SessionState) -> float:
-    if s.start_ts is None: return TIME_LIMIT_SECONDS
-    return max(0.0, TIME_LIMIT_SECONDS - (now() - s.start_ts))
+    if s.start_ts is None: return s.time_limit
+    return max(0.0, s.time_limit - (now() - s.start_ts))
+def ability_se(s: SessionState) -> float:
+    """Standard error of the ability estimate: 1 / sqrt(prior + information of the answered items)."""
+    info = 1.0 / THETA_PRIOR_VAR + sum(item_info(b, s.ability) for b in s.answered_b)
+    return 1.0 / math.sqrt(info)
+
+def min_reachable_se(n_answers: int) -> float:
+    """Lowest SE possible after `n_answers` (every item at its peak information, 1/4)."""
+    return 1.0 / math.sqrt(1.0 / THETA_PRIOR_VAR + 0.25 * n_answers)
+
+def uses_map_ability(s: SessionState) -> bool:
+    # ability_se is the posterior SE of a MAP estimate, so sessions relying on it use one
+    return s.selection == "fisher" or s.se_target > 0
+
+def map_ability(b_list: List[float], x_list: List[int], start: float = 0.0) -> float:
+    """MAP ability under the Rasch model with the N(0, THETA_PRIOR_VAR) prior (Newton steps)."""
+    theta = start
+    for _ in range(20):
+        grad, hess = -theta / THETA_PRIOR_VAR, 1.0 / THETA_PRIOR_VAR
+        for b, x in zip(b_list, x_list):
+            p = sigmoid(theta - b)
+            grad += x - p
+            hess += p * (1.0 - p)
+        step = max(-1.0, min(1.0, grad / hess))
+        theta += step
+        if abs(step) < 1e-6:
+            break
+    return theta
+
+if 0 < SE_TARGET <= min_reachable_se(MAX_QUESTIONS):
+    raise ValueError(f"QUIZ_SE_TARGET={SE_TARGET} is unreachable in {MAX_QUESTIONS} questions "
+                     f"(lowest possible SE {min_reachable_se(MAX_QUESTIONS):.3f})")
+
+EVENTS: Optional[EventLog] = (
+    EventLog(EVENT_LOG_DIR, max_bytes=EVENT_LOG_MAX_BYTES) if EVENT_LOG_DIR else None
+)
+def log_event(type: str, s: SessionState, **fields):
+    """Queue an event for the background flusher; never blocks on disk."""
+    if EVENTS is not None:
+        # one id per attempt: a restarted quiz is a new "session" for calibration
+        EVENTS.emit(type, session=f"{session_key(s.user, s.topic)}@{int(s.start_ts or 0)}", **fields)
 
 class EndSession:
     def __init__(self, reason: str): self.reason = reason
@@ -403,96 +1199,138 @@ def classify_by_score(score: int) -> str:
     if 6 <= score <= 7: return "Average"
     return "Poor"
 
+def classify_by_ability(ability: float) -> str:
+    """For sessions that stopped early: the expected score out of 10 (classify_by_score's scale)
+    on medium items, whatever the session's max_q."""
+    return classify_by_score(round(10 * sigmoid(ability - B_MAP['M'])))
+
 # =========================
 # Engine
 # =========================
-def pick_item(topic: str, difficulty: str, exclude_ids: Optional[set] = None) -> 'Item':
-    pool = [it for it in ITEM_BANK if it.topic == topic and it.difficulty == difficulty and (exclude_ids is None or it.id not in exclude_ids)]
-    if not pool:
-        pool = [it for it in ITEM_BANK if it.topic == topic and (exclude_ids is None or it.id not in exclude_ids)]
-    return random.choice(pool)
+def pick_item(topic: str, difficulty: str, exclude_ids: Optional[set] = None) -> Optional['Item']:
+    it = ITEM_BANK.draw(topic, difficulty, exclude_ids)
+    if it is None:
+        it = ITEM_BANK.draw(topic, None, exclude_ids)
+    return it
+
+def pick_item_fisher(topic: str, ability: float, exclude_ids: Optional[set] = None) -> Optional['Item']:
+    return ITEM_BANK.most_informative(topic, ability, exclude_ids, k=FISHER_TOP_K)
 
 def next_item(user, topic):
-    s = get_session_state(user, topic)
-    if s.start_ts is None: s.start_ts = now()
-    if time_remaining(s) <= 0: return EndSession("timeup")
-    if s.fatigue_score >= 3:   return EndSession("fatigue")
-    if s.asked_count >= 10:    return EndSession("max_q_reached")
-    it = pick_item(topic, difficulty=s.curr_band, exclude_ids=s.seen_item_ids)
-    s.asked_count += 1
-    s.seen_item_ids.add(it.id)
-    s.last_served_band = it.difficulty
-    s.last_served_was_review = False
-    save_session_state(s)
-    return it
+    ensure_topic(topic)
+    with session_lock(user, topic):
+        s = get_session_state(user, topic)
+        if s.start_ts is None: s.start_ts = now()
+        reason = None
+        if time_remaining(s) <= 0:     reason = "timeup"
+        elif s.fatigue_score >= 3:     reason = "fatigue"
+        elif s.asked_count >= s.max_q: reason = "max_q_reached"
+        elif (s.se_target > 0 and len(s.answered_b) >= SE_MIN_ANSWERS
+              and ability_se(s) <= s.se_target): reason = "se_reached"
+        if reason:
+            it = None
+        elif s.selection == "fisher":
+            it = pick_item_fisher(topic, s.ability, exclude_ids=s.seen_item_ids)
+        else:
+            it = pick_item(topic, difficulty=s.curr_band, exclude_ids=s.seen_item_ids)
+        if it is None:
+            reason = reason or "pool_exhausted"
+            s.end_reason = reason
+            save_session_state(s)
+            log_event("end", s, reason=reason, asked=s.asked_count, ability=s.ability, mastery=s.mastery,
+                      se=round(ability_se(s), 4))
+            return EndSession(reason)
+        s.asked_count += 1
+        s.seen_item_ids.add(it.id)
+        s.last_served_band = it.difficulty
+        s.last_served_was_review = False
+        save_session_state(s)
+        band = it.difficulty if s.selection == "fisher" else s.curr_band
+        maybe_refill(topic, band, s.seen_item_ids)   # enqueue only; never waits on the LLM
+        log_event("served", s, item_id=it.id, item_key=it.key, band=it.difficulty,
+                  n=s.asked_count, time_left=round(time_remaining(s), 1))
+        return it
 
-def record_response(user, topic, item: 'Item', chosen_index: int, time_sec: float, hint_used: bool = False):
-    s = get_session_state(user, topic)
-    b = B_MAP[item.difficulty]
-    correct = (chosen_index == item.correct_index)
-
-    # Ability (IRT-lite) with small hint damping
-    p = sigmoid(s.ability - b)
-    eta = 0.35
-    eta_eff = eta * (HINT_ETA_MULTIPLIER if hint_used else 1.0)
-    s.ability += eta_eff * ((1 if correct else 0) - p)
-
-    # Fatigue (relaxed timing threshold if hint used)
-    z = (time_sec - item.avg_time_sec) / max(1.0, item.sd_time_sec)
-    z_threshold = HINT_FATIGUE_RELAX_Z if hint_used else 1.5
-    if (z > z_threshold and not correct) or (s.acc_last5 <= 0.4 and len(s.window) >= 5):
-        s.fatigue_score += 1
-    else:
-        s.fatigue_score = max(0, s.fatigue_score - 1)
-
-    s.hint_window.append(1 if hint_used else 0)
-    if len(s.hint_window) > 5: s.hint_window.pop(0)
-    if sum(s.hint_window) >= 3 and len(s.hint_window) == 5:
-        s.fatigue_score = min(3, s.fatigue_score + 1)
-
-    # Rolling accuracy (partial credit)
-    if correct and not hint_used:
-        acc_credit = 1.0
-    elif correct and hint_used:
-        acc_credit = HINT_CORRECT_ACCURACY
-    elif not correct and hint_used:
-        acc_credit = HINT_WRONG_ACCURACY
-    else:
-        acc_credit = 0.0
-    s.window.append(acc_credit)
-    if len(s.window) > 5: s.window.pop(0)
-    s.acc_last5 = sum(s.window) / len(s.window)
-
-    # Mastery EWMA (partial credit)
-    if correct and not hint_used:
-        mastery_credit = 1.0
-    elif correct and hint_used:
-        mastery_credit = HINT_CORRECT_MASTERY
-    elif not correct and hint_used:
-        mastery_credit = HINT_WRONG_MASTERY
-    else:
-        mastery_credit = 0.0
-    s.mastery = 0.7 * s.mastery + 0.3 * mastery_credit
-
-    # Subskill mistakes
-    if not correct and item.subskill:
-        s.wrong_subskill_counts[item.subskill] = s.wrong_subskill_counts.get(item.subskill, 0) + 1
-
-    # Staircase logic
-    served = s.last_served_band or s.curr_band
-    if served == 'E':
-        s.curr_band = 'M' if correct else 'E'
-        s.h_wrong_streak = 0
-    elif served == 'M':
-        if correct and not hint_used: s.curr_band = 'H'
-        elif correct and hint_used:   s.curr_band = 'M'
-        else:                         s.curr_band = 'E'
-        s.h_wrong_streak = 0
-    elif served == 'H':
-        if correct:
-            s.h_wrong_streak = 0; s.curr_band = 'H'
+def record_response(user, topic, item: 'Item', chosen_index: int, time_sec: float, hint_used: bool = False) -> SessionState:
+    with session_lock(user, topic):
+        s = get_session_state(user, topic)
+        if s.last_answered_item_id == item.id:
+            return s
+        b = item_b(item)
+        correct = (chosen_index == item.correct_index)
+
+        # Ability (IRT-lite) with small hint damping
+        s.answered_b.append(b)
+        s.answered_x.append(1 if correct else 0)
+        if uses_map_ability(s):
+            s.ability = map_ability(s.answered_b, s.answered_x, s.ability)
+        else:
+            p = sigmoid(s.ability - b)
+            eta = 0.35
+            eta_eff = eta * (HINT_ETA_MULTIPLIER if hint_used else 1.0)
+            s.ability += eta_eff * ((1 if correct else 0) - p)
+
+        # Fatigue (relaxed timing threshold if hint used)
+        z = (time_sec - item.avg_time_sec) / max(1.0, item.sd_time_sec)
+        z_threshold = HINT_FATIGUE_RELAX_Z if hint_used else 1.5
+        if (z > z_threshold and not correct) or (s.acc_last5 <= 0.4 and len(s.window) >= 5):
+            s.fatigue_score += 1
+        else:
+            s.fatigue_score = max(0, s.fatigue_score - 1)
+
+        s.hint_window.append(1 if hint_used else 0)
+        if len(s.hint_window) > 5: s.hint_window.pop(0)
+        if sum(s.hint_window) >= 3 and len(s.hint_window) == 5:
+            s.fatigue_score = min(3, s.fatigue_score + 1)
+
+        # Rolling accuracy (partial credit)
+        if correct and not hint_used:
+            acc_credit = 1.0
+        elif correct and hint_used:
+            acc_credit = HINT_CORRECT_ACCURACY
+        elif not correct and hint_used:
+            acc_credit = HINT_WRONG_ACCURACY
+        else:
+            acc_credit = 0.0
+        s.window.append(acc_credit)
+        if len(s.window) > 5: s.window.pop(0)
+        s.acc_last5 = sum(s.window) / len(s.window)
+
+        # Mastery EWMA (partial credit)
+        if correct and not hint_used:
+            mastery_credit = 1.0
+        elif correct and hint_used:
+            mastery_credit = HINT_CORRECT_MASTERY
+        elif not correct and hint_used:
+            mastery_credit = HINT_WRONG_MASTERY
         else:
-            s.h_wrong_streak += 1
-            s.curr_band = 'M' if s.h_wrong_streak >= 2 else 'H'
+            mastery_credit = 0.0
+        s.mastery = 0.7 * s.mastery + 0.3 * mastery_credit
+
+        # Subskill mistakes
+        if not correct and item.subskill:
+            s.wrong_subskill_counts[item.subskill] = s.wrong_subskill_counts.get(item.subskill, 0) + 1
+
+        # Staircase logic
+        served = s.last_served_band or s.curr_band
+        if served == 'E':
+            s.curr_band = 'M' if correct else 'E'
+            s.h_wrong_streak = 0
+        elif served == 'M':
+            if correct and not hint_used: s.curr_band = 'H'
+            elif correct and hint_used:   s.curr_band = 'M'
+            else:                         s.curr_band = 'E'
+            s.h_wrong_streak = 0
+        elif served == 'H':
+            if correct:
+                s.h_wrong_streak = 0; s.curr_band = 'H'
+            else:
+                s.h_wrong_streak += 1
+                s.curr_band = 'M' if s.h_wrong_streak >= 2 else 'H'
 
-    save_session_state(s)
+        s.last_answered_item_id = item.id
+        save_session_state(s)
+        log_event("answer", s, item_id=item.id, item_key=item.key, band=item.difficulty,
+                  chosen=chosen_index, correct=correct, time_sec=round(time_sec, 2),
+                  hint_used=hint_used, ability=round(s.ability, 4), se=round(ability_se(s), 4))
+        return s
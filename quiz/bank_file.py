@@ -0,0 +1,154 @@
+# bank_file.py
+# Precompiled multi-topic item bank.
+#
+#   python -m quiz.bank_file compile banks/*.json -o items.qbank [--with-builtin]
+#
+# Source: one JSON file per topic (or a list of them):
+#   {"topic": "polymorphism", "keywords": ["polymorph", ...], "subskill": "polymorphism",
+#    "items": [{"band": "E", "stem": "...", "options": ["..", ..], "correct_index": 0,
+#               "subskill": null, "avg_time_sec": null, "sd_time_sec": null}, ...]}
+#
+# File layout (little endian):
+#   magic b"QBANK\x00\x01\x00" | u32 index length | index JSON | data blocks
+# The index maps topic -> keywords, subskill and band -> [offset, length, count] of a
+# zlib-compressed JSON block (offsets relative to the data start). Opening a file reads only
+# the index; a topic's blocks are decompressed from the mmap the first time it is loaded.
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+import zlib
+from typing import Dict, List, Optional
+
+MAGIC = b"QBANK\x00\x01\x00"
+HEADER = struct.Struct("<8sI")
+BANDS = ("E", "M", "H")
+
+# A record is [stem, options, correct_index, subskill, avg_time_sec, sd_time_sec] (last three nullable)
+Record = list
+
+
+class BankFile:
+    """Read-only view of a compiled bank; only the topic index is decoded up front."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: not an item bank file")
+        self._index: Dict[str, dict] = json.loads(self._mm[HEADER.size:HEADER.size + n])["topics"]
+        self._data = HEADER.size + n
+
+    def __contains__(self, topic: str) -> bool: return topic in self._index
+    def topics(self) -> List[str]: return sorted(self._index)
+
+    def keywords(self, topic: str) -> List[str]:
+        return list(self._index.get(topic, {}).get("keywords", []))
+
+    def subskill(self, topic: str) -> Optional[str]:
+        return self._index.get(topic, {}).get("subskill")
+
+    def count(self, topic: str, band: str) -> int:
+        ent = self._index.get(topic, {}).get("bands", {}).get(band)
+        return ent[2] if ent else 0
+
+    def records(self, topic: str, band: str) -> List[Record]:
+        ent = self._index.get(topic, {}).get("bands", {}).get(band)
+        if not ent:
+            return []
+        off, length, _ = ent
+        start = self._data + off
+        return json.loads(zlib.decompress(self._mm[start:start + length]))
+
+    def close(self):
+        self._mm.close()
+
+
+# =========================
+# Compiler
+# =========================
+def _record(it: dict) -> Record:
+    options = list(it["options"])
+    idx = int(it["correct_index"])
+    if len(options) < 2 or not 0 <= idx < len(options):
+        raise ValueError(f"bad item: {it.get('stem')!r}")
+    return [it["stem"], options, idx, it.get("subskill"), it.get("avg_time_sec"), it.get("sd_time_sec")]
+
+
+def compile_bank(topics: List[dict], path: str) -> Dict[str, int]:
+    """Write `topics` (source dicts, see module header) to `path`; returns items per topic."""
+    index: Dict[str, dict] = {}
+    blocks: List[bytes] = []
+    offset = 0
+    counts: Dict[str, int] = {}
+    for src in topics:
+        topic = src["topic"]
+        if topic in index:
+            raise ValueError(f"duplicate topic {topic!r}")
+        by_band: Dict[str, List[Record]] = {b: [] for b in BANDS}
+        for it in src.get("items", []):
+            band = it.get("band", "M")
+            if band not in by_band:
+                raise ValueError(f"{topic}: unknown band {band!r}")
+            by_band[band].append(_record(it))
+        entry = {"keywords": list(src.get("keywords", [])), "subskill": src.get("subskill"), "bands": {}}
+        for band, recs in by_band.items():
+            if not recs:
+                continue
+            blob = zlib.compress(json.dumps(recs, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9)
+            entry["bands"][band] = [offset, len(blob), len(recs)]
+            blocks.append(blob)
+            offset += len(blob)
+        index[topic] = entry
+        counts[topic] = sum(len(r) for r in by_band.values())
+
+    head = json.dumps({"version": 1, "topics": index}, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, len(head)))
+        fh.write(head)
+        for blob in blocks:
+            fh.write(blob)
+    return counts
+
+
+def _builtin_sources() -> List[dict]:
+    from quiz.adaptive_inheritance_quiz import (DEFAULT_TOPIC, _inheritance_bank, topic_keywords_for)
+    items = [{"band": band, "stem": stem, "options": options, "correct_index": idx}
+             for band, rows in _inheritance_bank().items() for stem, options, idx in rows]
+    return [{"topic": DEFAULT_TOPIC, "keywords": topic_keywords_for(DEFAULT_TOPIC),
+             "subskill": "inheritance", "items": items}]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compile topic JSON sources into an item bank file")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compile")
+    c.add_argument("inputs", nargs="*", help="topic source JSON files")
+    c.add_argument("-o", "--output", default="items.qbank")
+    c.add_argument("--with-builtin", action="store_true", help="include the built-in inheritance bank")
+    ls = sub.add_parser("ls")
+    ls.add_argument("path")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "ls":
+        bf = BankFile(args.path)
+        for t in bf.topics():
+            print(t, " ".join(f"{b}={bf.count(t, b)}" for b in BANDS))
+        return
+
+    sources: List[dict] = _builtin_sources() if args.with_builtin else []
+    for path in args.inputs:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        sources.extend(data if isinstance(data, list) else [data])
+    counts = compile_bank(sources, args.output)
+    print(f"compiled {sum(counts.values())} items in {len(counts)} topics -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
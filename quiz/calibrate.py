@@ -0,0 +1,131 @@
+# calibrate.py
+# Offline item calibration from logged responses.
+#
+#   python -m quiz.calibrate responses/*.jsonl -o calibration.json
+#
+# Input: JSONL, one response per line with at least
+#   {"session": "<user::topic>", "item_key": "<Item.key>", "band": "E|M|H", "correct": true, "time_sec": 17.2}
+# (lines with a "type" other than "answer" are skipped, so the engine's event log can be fed directly).
+#
+# Fits a Rasch (1PL) model p = sigmoid(theta_s - b_i) by joint MAP with Newton steps over the
+# whole sparse response matrix at once (theta ~ N(0, 1), b_i ~ N(B_MAP[band], 1)), and estimates
+# per-item timing norms shrunk towards the band defaults. Load the output with QUIZ_CALIBRATION.
+
+import argparse
+import glob
+import json
+import sys
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from quiz.adaptive_inheritance_quiz import B_MAP, BAND_TIME
+
+THETA_PRIOR_VAR = 1.0
+B_PRIOR_VAR = 1.0
+TIME_PRIOR_WEIGHT = 5.0   # pseudo-responses pulling timing norms towards the band default
+
+
+def read_responses(paths: Iterable[str]) -> List[dict]:
+    rows = []
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                rec = json.loads(line)
+                if rec.get("type", "answer") != "answer" or not rec.get("item_key"):
+                    continue
+                rows.append(rec)
+    return rows
+
+
+def fit_rasch(sess_idx: np.ndarray, item_idx: np.ndarray, correct: np.ndarray, b_prior: np.ndarray,
+              max_iter: int = 100, tol: float = 1e-4):
+    """Joint MAP estimate of abilities and difficulties; all arrays are per-response (COO)."""
+    n_sess = int(sess_idx.max()) + 1
+    n_items = len(b_prior)
+    theta = np.zeros(n_sess)
+    b = b_prior.copy()
+    for _ in range(max_iter):
+        p = 1.0 / (1.0 + np.exp(-(theta[sess_idx] - b[item_idx])))
+        resid = correct - p
+        info = p * (1.0 - p)
+        g_theta = np.bincount(sess_idx, resid, n_sess) - theta / THETA_PRIOR_VAR
+        h_theta = np.bincount(sess_idx, info, n_sess) + 1.0 / THETA_PRIOR_VAR
+        g_b = -np.bincount(item_idx, resid, n_items) - (b - b_prior) / B_PRIOR_VAR
+        h_b = np.bincount(item_idx, info, n_items) + 1.0 / B_PRIOR_VAR
+        step_theta = g_theta / h_theta
+        step_b = g_b / h_b
+        theta += step_theta
+        b += step_b
+        if max(np.abs(step_theta).max(), np.abs(step_b).max()) < tol:
+            break
+    return theta, b
+
+
+def timing_norms(item_idx: np.ndarray, times: np.ndarray, prior_avg: np.ndarray, prior_sd: np.ndarray):
+    n_items = len(prior_avg)
+    ok = np.isfinite(times) & (times > 0)
+    idx, t = item_idx[ok], times[ok]
+    n = np.bincount(idx, minlength=n_items).astype(float)
+    s1 = np.bincount(idx, t, n_items)
+    s2 = np.bincount(idx, t * t, n_items)
+    w = TIME_PRIOR_WEIGHT
+    avg = (s1 + w * prior_avg) / (n + w)
+    # shrink the second moment the same way, then sd = sqrt(E[t^2] - avg^2)
+    m2 = (s2 + w * (prior_sd ** 2 + prior_avg ** 2)) / (n + w)
+    sd = np.sqrt(np.maximum(m2 - avg ** 2, 1.0))
+    return avg, sd
+
+
+def calibrate(rows: List[dict]) -> Dict[str, object]:
+    sessions: Dict[str, int] = {}
+    items: Dict[str, int] = {}
+    bands: List[str] = []
+    s_idx, i_idx, corr, times = [], [], [], []
+    for r in rows:
+        key = r["item_key"]
+        if key not in items:
+            items[key] = len(items)
+            bands.append(r.get("band") or "M")
+        s_idx.append(sessions.setdefault(str(r.get("session", "")), len(sessions)))
+        i_idx.append(items[key])
+        corr.append(1.0 if r.get("correct") else 0.0)
+        times.append(float(r.get("time_sec") or np.nan))
+    if not items:
+        return {"version": 1, "items": {}}
+
+    s_idx = np.asarray(s_idx, dtype=np.int64)
+    i_idx = np.asarray(i_idx, dtype=np.int64)
+    b_prior = np.array([B_MAP.get(bd, 0.0) for bd in bands])
+    _, b = fit_rasch(s_idx, i_idx, np.asarray(corr), b_prior)
+    prior_avg = np.array([BAND_TIME.get(bd, BAND_TIME["M"])[0] for bd in bands])
+    prior_sd = np.array([BAND_TIME.get(bd, BAND_TIME["M"])[1] for bd in bands])
+    avg, sd = timing_norms(i_idx, np.asarray(times), prior_avg, prior_sd)
+    counts = np.bincount(i_idx, minlength=len(items))
+
+    out = {}
+    for key, j in items.items():
+        out[key] = {"b": round(float(b[j]), 4), "avg_time_sec": round(float(avg[j]), 2),
+                    "sd_time_sec": round(float(sd[j]), 2), "n": int(counts[j])}
+    return {"version": 1, "sessions": len(sessions), "responses": len(rows), "items": out}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Calibrate item difficulty and timing from response logs")
+    ap.add_argument("inputs", nargs="+", help="JSONL response logs (globs allowed)")
+    ap.add_argument("-o", "--output", default="calibration.json")
+    args = ap.parse_args(argv)
+
+    paths = sorted({p for pattern in args.inputs for p in (glob.glob(pattern) or [pattern])})
+    result = calibrate(read_responses(paths))
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(result, fh, indent=1)
+    print(f"calibrated {len(result['items'])} items from {result.get('responses', 0)} responses "
+          f"-> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# event_log.py
+# Append-only response event log:
+# - emit() only appends to an in-memory deque (never touches disk, never blocks)
+# - a background thread drains it in batches into rotating JSONL files
+# - files are per process (pid in the name), so several workers can share a directory
+# - a failed write (disk full, directory removed) drops that batch and reopens the file on
+#   the next interval; the flusher never dies
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from quiz import metrics
+
+logger = logging.getLogger(__name__)
+
+class EventLog:
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024, batch_size: int = 512,
+                 flush_interval: float = 1.0, max_queue: int = 100_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fh = None
+        self._written = 0
+
+    # ---- request path
+    def emit(self, type: str, **fields):
+        if len(self._queue) >= self.max_queue:
+            metrics.EVENTS_DROPPED.inc()
+            return
+        fields["type"] = type
+        fields["ts"] = round(time.time(), 3)
+        self._queue.append(fields)   # deque.append is atomic; no lock on the hot path
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    # ---- background flusher
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        while self._queue:
+            lines = []
+            while self._queue and len(lines) < self.batch_size:
+                lines.append(json.dumps(self._queue.popleft(), separators=(",", ":"), default=str))
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            try:
+                fh = self._file(len(data))
+                fh.write(data)
+                fh.flush()
+            except OSError:
+                logger.exception("event log write failed; dropped %d events", len(lines))
+                metrics.EVENT_LOG_ERRORS.inc()
+                metrics.EVENTS_DROPPED.inc(len(lines))
+                self._reset_file()
+                return   # the rest waits for the next interval
+            self._written += len(data)
+
+    def _reset_file(self):
+        fh, self._fh = self._fh, None
+        if fh is not None:
+            try:
+                fh.close()
+            except OSError:
+                pass
+
+    def _file(self, incoming: int):
+        if self._fh is not None and self._written + incoming > self.max_bytes:
+            self._fh.close()
+            self._fh = None
+        if self._fh is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.directory, f"events-{stamp}-{os.getpid()}-{time.monotonic_ns() % 10**6}.jsonl")
+            self._fh = open(path, "ab")
+            self._written = 0
+        return self._fh
@@ -3,11 +3,13 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
-import time
+from typing import Literal, Optional, List
+import json
 
 import quiz.adaptive_inheritance_quiz as engine
+from quiz import metrics
 
 app = FastAPI(title="Adaptive Quiz Engine")
 
@@ -20,13 +22,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus: per-route latency/status + GET /metrics
+metrics.install(app)
+
 # ---------- Request models ----------
 class StartReq(BaseModel):
     user_id: str
     topic: str = "inheritance oops"
     time_limit: int = 300
     max_q: int = 10
-    ai: str = "auto"
+    ai: Literal["auto", "openai", "anthropic", "off"] = "auto"   # engine.AI_MODES
+    selection: Optional[str] = None     # "staircase" | "fisher"; default QUIZ_SELECTION
+    se_target: Optional[float] = None   # end early once SE(ability) <= se_target; default QUIZ_SE_TARGET
 
 class NextReq(BaseModel):
     user_id: str
@@ -62,42 +69,60 @@ class ExplainBatchReq(BaseModel):
 # ---------- Startup ----------
 @app.on_event("startup")
 def boot():
-    engine.TIME_LIMIT_SECONDS = 300
-    engine.ITEM_BANK.clear()
-    engine.CORRECT_MAP.clear()
-    engine.seed_inheritance_fallback(per_band=10, topic="inheritance oops")
-    engine.ensure_pool_size_exact(topic="inheritance oops", per_band=10)
-    engine.AI = engine.AIClient(preferred="auto")
+    # Idempotent: a repeated startup (reload, tests) keeps pools already built instead of reshuffling
+    if engine.CALIBRATION_PATH and not engine.CALIBRATION:
+        engine.load_calibration(engine.CALIBRATION_PATH)
+    if engine.BANK_PATH and engine.BANK_FILE is None:
+        engine.open_bank_file(engine.BANK_PATH)   # index only; pools are built per topic on first use
+    if engine.AI is None:
+        engine.AI = engine.AIClient(preferred="auto")   # no SDK import until the first call
+    if engine.GEN_ENABLED:
+        engine.start_generator()                  # before preloading, so preloaded topics get pre-generated
+    for topic in engine.PRELOAD_TOPICS:
+        engine.ensure_topic(topic, per_band=10)
+    if engine.AI_WARMUP:
+        engine.warmup_ai_cache(list(engine.ITEM_BANK))
+    if engine.EVENTS is not None:
+        engine.EVENTS.start()
+
+@app.on_event("shutdown")
+def shutdown():
+    if engine.EVENTS is not None:
+        engine.EVENTS.close()   # final flush of queued events
 
 # ---------- Routes ----------
 @app.post("/session/start")
 def start(req: StartReq):
-    s = engine.get_session_state(req.user_id, req.topic)
-    s.start_ts = None
-    s.ability = 0.0
-    s.mastery = 0.0
-    s.fatigue_score = 0
-    s.curr_band = "E"
-    s.last_served_band = None
-    s.last_served_was_review = False
-    s.asked_count = 0
-    s.window.clear()
-    s.acc_last5 = 0.0
-    s.hint_window.clear()
-    s.seen_item_ids.clear()
-    s.wrong_subskill_counts.clear()
-    s.h_wrong_streak = 0
-    engine.TIME_LIMIT_SECONDS = req.time_limit
-    engine.save_session_state(s)
+    # A fresh state resets every counter; the lock keeps in-flight requests of this session out
+    selection = req.selection or engine.SELECTION_MODE
+    if selection not in ("staircase", "fisher"):
+        raise HTTPException(400, "selection must be 'staircase' or 'fisher'")
+    max_q = max(1, req.max_q)
+    if req.se_target:   # reject targets no session of this length can reach
+        floor = engine.min_reachable_se(max_q)
+        if max_q < engine.SE_MIN_ANSWERS or req.se_target <= floor:
+            raise HTTPException(400, f"se_target must be above {floor:.3f} for max_q={max_q} "
+                                     f"(and max_q at least {engine.SE_MIN_ANSWERS})")
+    engine.ensure_topic(req.topic)   # unknown topics end at the first /next with pool_exhausted
+    with engine.session_lock(req.user_id, req.topic):
+        s = engine.SessionState(
+            user=req.user_id, topic=req.topic,
+            time_limit=max(1, req.time_limit),
+            max_q=max_q,
+            ai_mode=req.ai,
+            selection=selection,
+            se_target=max(0.0, engine.SE_TARGET if req.se_target is None else req.se_target),
+        )
+        engine.save_session_state(s)
     return {"ok": True}
 
 @app.post("/session/next")
 def next_item(req: NextReq):
-    nxt = engine.next_item(req.user_id, req.topic)
-    if isinstance(nxt, engine.EndSession):
-        return {"end": True, "reason": nxt.reason}
-    s = engine.get_session_state(req.user_id, req.topic)
-    rem = max(0, int(engine.TIME_LIMIT_SECONDS - (time.time() - s.start_ts)))
+    with engine.session_lock(req.user_id, req.topic):
+        nxt = engine.next_item(req.user_id, req.topic)
+        if isinstance(nxt, engine.EndSession):
+            return {"end": True, "reason": nxt.reason}
+        rem = int(engine.time_remaining(engine.get_session_state(req.user_id, req.topic)))
     return {
         "end": False,
         "item": {
@@ -112,22 +137,25 @@ def next_item(req: NextReq):
 
 @app.post("/session/hint")
 def hint(req: HintReq):
-    it = next((x for x in engine.ITEM_BANK if x.id == req.item_id), None)
+    engine.ensure_topic(req.topic)   # another worker may have served this item first
+    it = engine.ITEM_BANK.get(req.item_id)
     if not it:
         raise HTTPException(404, "Item not found")
-    hint = engine.AI.generate_hint(it.text, it.options, it.subskill)
+    s = engine.get_session_state(req.user_id, req.topic)
+    hint = engine.get_ai(s.ai_mode).generate_hint(it.text, it.options, it.subskill)
+    engine.log_event("hint", s, item_id=it.id, item_key=it.key, band=it.difficulty)
     return {"hint": hint}
 
 @app.post("/session/answer")
 def answer(req: AnswerReq):
-    it = next((x for x in engine.ITEM_BANK if x.id == req.item_id), None)
+    engine.ensure_topic(req.topic)   # another worker may have served this item first
+    it = engine.ITEM_BANK.get(req.item_id)
     if not it:
         raise HTTPException(404, "Item not found")
     elapsed = float(req.time_sec or 0.0)
     if elapsed <= 0:
         elapsed = max(0.1, it.avg_time_sec)
-    engine.record_response(req.user_id, req.topic, it, req.choice_index, elapsed, req.hint_used)
-    s = engine.get_session_state(req.user_id, req.topic)
+    s = engine.record_response(req.user_id, req.topic, it, req.choice_index, elapsed, req.hint_used)
     return {
         "correct": (req.choice_index == it.correct_index),
         "correct_index": it.correct_index,
@@ -137,32 +165,80 @@ def answer(req: AnswerReq):
             "ability": s.ability,
             "acc_last5": s.acc_last5,
             "fatigue": s.fatigue_score,
-            "mastery": s.mastery
+            "mastery": s.mastery,
+            "se": engine.ability_se(s),
         }
     }
 
-@app.post("/session/explain_batch")
-def explain_batch(req: ExplainBatchReq):
+def _summary(req: ExplainBatchReq) -> dict:
     # Score purely from correctness in entries
     score = sum(1 for e in req.entries if e.chosen_index == e.correct_index)
-    out = []
-    for e in req.entries:
-        exp = engine.AI.generate_explanation(e.item_text, e.options, e.correct_index, e.chosen_index)
-        out.append({
-            "item_id": e.item_id,
-            "explanation": exp,
-            "chosen_index": e.chosen_index,
-            "correct_index": e.correct_index
-        })
     s = engine.get_session_state(req.user_id, req.topic)
-    label = engine.classify_by_score(score)
+    if s.end_reason == "se_reached":   # a few items: the ability estimate says more than the raw score
+        classification = engine.classify_by_ability(s.ability)
+    else:
+        classification = engine.classify_by_score(score)
     return {
-        "classification": label,
+        "classification": classification,
         "score": score,
         "asked": len(req.entries),
         "ability": s.ability,
         "mastery": s.mastery,
         "acc_last5": s.acc_last5,
         "fatigue": s.fatigue_score,
+        "se": engine.ability_se(s),
+        "end_reason": s.end_reason,
+    }
+
+@app.post("/session/explain_batch")
+def explain_batch(req: ExplainBatchReq):
+    s = engine.get_session_state(req.user_id, req.topic)
+    expls = engine.explain_entries(
+        [(e.item_text, e.options, e.correct_index, e.chosen_index) for e in req.entries],
+        ai=engine.get_ai(s.ai_mode),
+    )
+    out = []
+    for e, (exp, partial) in zip(req.entries, expls):
+        out.append({
+            "item_id": e.item_id,
+            "explanation": exp,
+            "partial": partial,
+            "chosen_index": e.chosen_index,
+            "correct_index": e.correct_index
+        })
+    return {
+        **_summary(req),
+        "partial": any(x["partial"] for x in out),
         "explanations": out
     }
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/session/explain_stream")
+def explain_stream(req: ExplainBatchReq):
+    """SSE variant of explain_batch: summary first, then token/explanation events as they arrive."""
+    summary = _summary(req)
+    ai = engine.get_ai(engine.get_session_state(req.user_id, req.topic).ai_mode)
+    entries = [(e.item_text, e.options, e.correct_index, e.chosen_index) for e in req.entries]
+
+    def events():
+        yield _sse("summary", summary)
+        partial_any = False
+        for ev in engine.stream_explain_entries(entries, ai=ai):
+            e = req.entries[ev[1]]
+            if ev[0] == "token":
+                yield _sse("token", {"item_id": e.item_id, "delta": ev[2]})
+                continue
+            partial_any = partial_any or ev[3]
+            yield _sse("explanation", {
+                "item_id": e.item_id,
+                "explanation": ev[2],
+                "partial": ev[3],
+                "chosen_index": e.chosen_index,
+                "correct_index": e.correct_index,
+            })
+        yield _sse("done", {"partial": partial_any})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
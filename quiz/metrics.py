@@ -0,0 +1,75 @@
+# metrics.py
+# Prometheus metrics for the quiz engine (HTTP routes, AI provider calls, engine gauges).
+# With several workers, set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates all of them.
+
+import os
+import time
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               REGISTRY, generate_latest, multiprocess)
+
+MULTIPROC = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_LATENCY = Histogram(
+    "quiz_http_request_seconds", "Quiz engine request latency", ["route", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20),
+)
+HTTP_REQUESTS = Counter("quiz_http_requests_total", "Quiz engine requests", ["route", "method", "status"])
+
+AI_LATENCY = Histogram(
+    "quiz_ai_call_seconds", "LLM provider call latency (per attempt)", ["provider", "kind"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16),
+)
+AI_RETRIES = Counter("quiz_ai_retries_total", "LLM calls retried after an error", ["provider"])
+AI_TIMEOUTS = Counter("quiz_ai_timeouts_total", "LLM calls that timed out", ["provider"])
+AI_THROTTLED = Counter("quiz_ai_throttled_total", "LLM calls given up after waiting for a concurrency slot", ["provider"])
+AI_DEGRADES = Counter("quiz_ai_degrades_total", "Switches from a provider to fallback mode", ["provider"])
+
+ITEMS_GENERATED = Counter("quiz_generated_items_total", "AI-generated items by result (accepted, a rejection reason, or error for failed calls)", ["result"])
+EVENTS_DROPPED = Counter("quiz_events_dropped_total", "Events dropped (event log queue full or write failed)")
+EVENT_LOG_ERRORS = Counter("quiz_event_log_errors_total", "Failed event log writes")
+
+# Set where the values change (session store writes, item bank writes), not at scrape time, so
+# every worker reports a current value. Memory stores are per process and add up; the sqlite
+# store is shared, so the latest count written by any worker is the total.
+ACTIVE_SESSIONS = Gauge(
+    "quiz_active_sessions", "Sessions held by the session store",
+    multiprocess_mode="livemostrecent" if os.environ.get("QUIZ_SESSION_BACKEND") == "sqlite" else "livesum",
+)
+ITEM_BANK_SIZE = Gauge("quiz_item_bank_items", "Items in the item bank", multiprocess_mode="livemax")
+
+
+def record_ai_error(provider: str, exc: Exception, retrying: bool):
+    # SDK timeout classes (openai.APITimeoutError, anthropic.APITimeoutError, httpx.*Timeout)
+    if "timeout" in type(exc).__name__.lower():
+        AI_TIMEOUTS.labels(provider).inc()
+    if retrying:
+        AI_RETRIES.labels(provider).inc()
+
+
+def install(app):
+    """Add the request-timing middleware and GET /metrics to the FastAPI app."""
+    from fastapi import Request, Response
+
+    @app.middleware("http")
+    async def _timing(request: Request, call_next):
+        t0 = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_LATENCY.labels(path, request.method).observe(time.perf_counter() - t0)
+            HTTP_REQUESTS.labels(path, request.method, str(status)).inc()
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        if MULTIPROC:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,172 @@
+# session_store.py
+# Pluggable session storage for the adaptive quiz engine:
+# - MemorySessionStore: per-process LRU with sliding TTL (default)
+# - SQLiteSessionStore: on-disk store in WAL mode, shared by several worker processes
+
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from quiz import metrics
+
+
+class SessionStore(ABC):
+    """Interface used by get_session_state/save_session_state.
+
+    Abstract: a backend missing a method fails when it is instantiated.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]: ...
+
+    @abstractmethod
+    def put(self, key: str, state: Any) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    def purge_expired(self) -> int:
+        return 0
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store, bounded by entry count (LRU) and idle time (TTL).
+
+    Holds the live objects, so in-place mutations are visible without a put.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (state, expires_at)
+        self._lock = threading.Lock()
+        metrics.ACTIVE_SESSIONS.set(0)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            state, expires_at = hit
+            now = time.time()
+            if expires_at <= now:
+                del self._data[key]
+                metrics.ACTIVE_SESSIONS.set(len(self._data))
+                return None
+            self._data[key] = (state, now + self.ttl)
+            self._data.move_to_end(key)
+            return state
+
+    def put(self, key: str, state: Any) -> None:
+        with self._lock:
+            self._data[key] = (state, time.time() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            metrics.ACTIVE_SESSIONS.set(len(self._data))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            metrics.ACTIVE_SESSIONS.set(len(self._data))
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            dead = [k for k, (_, exp) in self._data.items() if exp <= now]
+            for k in dead:
+                del self._data[k]
+            metrics.ACTIVE_SESSIONS.set(len(self._data))
+        return len(dead)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Shared on-disk store for multi-worker deployments on one host.
+
+    States go through `dumps`/`loads` (str <-> state); each thread keeps its own
+    connection. WAL mode lets readers proceed while another process writes.
+    """
+
+    PURGE_EVERY = 500     # puts between opportunistic purges of expired rows
+    COUNT_EVERY = 5.0     # seconds between session counts for the gauge (a COUNT per put is too much)
+
+    def __init__(self, path: str, dumps: Callable[[Any], str], loads: Callable[[str], Any],
+                 ttl_seconds: float = 3600):
+        self.path = path
+        self.dumps = dumps
+        self.loads = loads
+        self.ttl = ttl_seconds
+        self._local = threading.local()
+        self._puts = 0
+        self._counted_at = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " key TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions(expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return self.loads(row[0]) if row else None
+
+    def put(self, key: str, state: Any) -> None:
+        self._conn().execute(
+            "INSERT INTO sessions (key, data, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+            (key, self.dumps(state), time.time() + self.ttl),
+        )
+        self._puts += 1
+        if self._puts % self.PURGE_EVERY == 0:
+            self.purge_expired()
+        elif time.time() - self._counted_at > self.COUNT_EVERY:
+            self._update_gauge()
+
+    def _update_gauge(self):
+        self._counted_at = time.time()
+        metrics.ACTIVE_SESSIONS.set(len(self))
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        cur = self._conn().execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        self._update_gauge()
+        return cur.rowcount
+
+    def __len__(self) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        return int(row[0])
+
+
+def make_session_store(backend: str, dumps: Callable[[Any], str], loads: Callable[[str], Any],
+                       ttl_seconds: float, max_entries: int,
+                       path: Optional[str] = None) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteSessionStore(path or os.path.abspath("quiz_sessions.db"), dumps, loads,
+                                  ttl_seconds=ttl_seconds)
+    raise ValueError(f"unknown session backend: {backend!r}")